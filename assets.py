@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pygame
+
+BLACK = (0, 0, 0)
+
+
+def resource_path(*parts) -> str:
+    # В сборке pyinstaller -F данные распаковываются во временную папку sys._MEIPASS.
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, *parts)
+
+
+class AssetManager:
+    # Картинки из sprites/ загружаются и конвертируются один раз на весь запуск,
+    # повернутые копии хранятся по квантованному углу.
+    def __init__(self, folder: str = "sprites", angle_step: float = 1.) -> None:
+        self.folder = folder
+        self.angle_step = angle_step
+        self.images = {}
+        self.rotated = {}
+
+    def preload(self) -> None:
+        # Вызывать после pygame.display.set_mode: convert() нужен режим экрана.
+        folder = resource_path(self.folder)
+        if not os.path.isdir(folder):
+            return
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith((".png", ".bmp", ".jpg")):
+                self.image(name)
+
+    def image(self, name: str) -> pygame.Surface:
+        image = self.images.get(name)
+        if image is None:
+            image = pygame.image.load(resource_path(self.folder, name)).convert()
+            image.set_colorkey(BLACK)
+            self.images[name] = image
+        return image
+
+    def quantize(self, angle: float) -> int:
+        return round(angle / self.angle_step)
+
+    def rotated_image(self, name: str, angle: float) -> pygame.Surface:
+        # angle в градусах, против часовой стрелки, как у pygame.transform.
+        key = (name, self.quantize(angle))
+        image = self.rotated.get(key)
+        if image is None:
+            # Прозрачность по цветовому ключу переводим в альфу, чтобы rotozoom не оставил черных углов.
+            source = self.image(name).convert_alpha()
+            image = pygame.transform.rotozoom(source, key[1] * self.angle_step, 1)
+            self.rotated[key] = image
+        return image
+
+    def prepare_rotations(self, name: str, max_angle: float) -> None:
+        # Заранее поворачиваем картинку на все углы из [-max_angle, max_angle].
+        limit = self.quantize(min(abs(max_angle), 180))
+        for i in range(-limit, limit + 1):
+            self.rotated_image(name, i * self.angle_step)
+
+
+ASSETS = AssetManager()
@@ -0,0 +1,225 @@
+import os
+
+# Окно и графики не нужны: до импорта pygame и matplotlib переключаемся на "пустые" бэкенды.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import pygame
+
+PENDULUM_BUDGET = 1000 / 20 # мс на кадр при 20 FPS
+ELECTRONIC_BUDGET = 1000 / 15 # мс на кадр при 15 FPS
+STARTUP_BUDGET = 1000 # мс от запуска main.py до меню
+READY_BUDGET = 3000 # мс до конца фонового импорта модулей симуляций
+
+
+def measure(func, number: int = 10, repeat: int = 5) -> float:
+    # Медиана среднего времени одного вызова по repeat сериям, в миллисекундах.
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        results.append((time.perf_counter() - start) / number * 1000)
+    return statistics.median(results)
+
+
+class FrameClock:
+    # Замена pygame.time.Clock для замера кадра: каждый кадр "длится" ровно 1 / fps секунды,
+    # поэтому симуляция продвигается как в живом цикле, но tick не спит.
+    def __init__(self, fps: int) -> None:
+        self.fps = fps
+
+    def tick(self, framerate: int = 0) -> float:
+        return 1000 / self.fps
+
+
+def sprite_exists(name: str) -> bool:
+    return os.path.exists(os.path.join(os.path.dirname(__file__), "sprites", name))
+
+
+def bench_area(screen, results: dict, quick: bool) -> None:
+    from electronic_oscillator import Area, gradient_surface
+    from point import Point
+
+    for radius in (10, 50, 100, 190):
+        area = Area(Point(400, 200), radius, (139, 0, 255), screen)
+        area.set_radius(radius)
+
+        def cold():
+            gradient_surface.cache_clear()
+            area.drawn_radius = None
+            area.update()
+            screen.blit(area.image, area.rect)
+
+        def warm():
+            area.drawn_radius = None
+            area.update()
+            screen.blit(area.image, area.rect)
+
+        results[f"area_update_cold_r{radius}"] = (measure(cold, 3 if quick else 10), ELECTRONIC_BUDGET)
+        results[f"area_update_warm_r{radius}"] = (measure(warm, 10 if quick else 100), ELECTRONIC_BUDGET)
+
+
+def bench_pendulum(results: dict, quick: bool) -> None:
+    from pendulum_model import Pendulum, trajectory_table
+    from point import Point
+
+    for amplitude in (5, 30, 90, 170):
+        def generate():
+            trajectory_table.cache_clear()
+            Pendulum(Point(400, 0), 300, 2., amplitude)
+
+        pendulum = Pendulum(Point(400, 0), 300, 2., amplitude)
+        results[f"generate_trajectory_a{amplitude}"] = (measure(generate, 3 if quick else 20), PENDULUM_BUDGET)
+        results[f"pendulum_move_a{amplitude}"] = (measure(pendulum.move, 100 if quick else 1000), PENDULUM_BUDGET)
+
+
+def bench_graph(results: dict, quick: bool) -> None:
+    from graph_drawer import open_graph
+
+    # Окно matplotlib и панель в окне pygame (main.py --graphs pygame).
+    for name, backend in (("graph", "matplotlib"), ("panel_graph", "pygame")):
+        graph = open_graph(backend, 100, 100, "Смещение", "Скорость")
+        if backend == "pygame":
+            graph.place(pygame.Rect(0, 400, 400, 200))
+        moment = [0.]
+
+        def update():
+            moment[0] += 0.05
+            graph.update(moment[0], moment[0] % 7, moment[0] % 3)
+
+        # Время одного кадра по мере роста истории: стоимость не должна зависеть от её длины.
+        for history in (0, 1000, 5000) if not quick else (0, 1000):
+            while moment[0] < history * 0.05:
+                update()
+            results[f"{name}_update_h{history}"] = (measure(update, 10 if quick else 50), PENDULUM_BUDGET)
+        graph.close()
+
+
+def bench_table(screen, results: dict, quick: bool) -> None:
+    from pendulum import PendulumDrawer
+    from point import Point
+
+    drawer = PendulumDrawer(Point(400, 0), 300, 2., 30, "pendulum.png", screen)
+    for interval in (0.25, 1e-2, 1e-3) if quick else (0.25, 1e-2, 1e-3, 1e-4):
+        results[f"get_data_for_table_{interval:g}"] = (
+            measure(lambda: drawer.get_data_for_table(interval), 1, 3), PENDULUM_BUDGET
+        )
+    drawer.abort()
+
+
+def bench_frames(results: dict, quick: bool) -> None:
+    import main
+    from electronic_oscillator import ElectronicOscillatorDrawer
+    from pendulum import PendulumDrawer
+    from point import Point
+
+    application = main.Application()
+    drawers = {
+        "pendulum": (lambda: PendulumDrawer(Point(400, 0), 300, 2., 30, "pendulum.png", main.screen), PENDULUM_BUDGET),
+    }
+    if sprite_exists("electronic_oscillator.png"):
+        drawers["electronic"] = (
+            lambda: ElectronicOscillatorDrawer(Point(400, 200), 30, 1., "electronic_oscillator.png", main.screen),
+            ELECTRONIC_BUDGET
+        )
+    else:
+        print("sprites/electronic_oscillator.png не найден, кадр контура не измеряется", file=sys.stderr)
+
+    for name, (factory, budget) in drawers.items():
+        application.app = main.NoMenu()
+        drawer = factory()
+        application.scene.add(drawer)
+        application.clock = FrameClock(drawer.fps)
+        results[f"main_frame_{name}"] = (measure(application.frame, 10 if quick else 50), budget)
+        application.scene.abort()
+    pygame.quit()
+
+
+def bench_startup(results: dict, quick: bool) -> None:
+    # Запуск main.py в отдельном процессе: время до первого кадра меню и до конца фонового импорта.
+    menu_times, ready_times = [], []
+    for _ in range(1 if quick else 5):
+        output = subprocess.run(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"), "--startup"],
+            capture_output=True, text=True, encoding="utf-8", check=True
+        ).stderr
+        menu, ready = re.search(r"Меню: (\d+) мс, все модули: (\d+) мс", output).groups()
+        menu_times.append(float(menu))
+        ready_times.append(float(ready))
+    results["startup_menu"] = (statistics.median(menu_times), STARTUP_BUDGET)
+    results["startup_ready"] = (statistics.median(ready_times), READY_BUDGET)
+
+
+def run(quick: bool = False) -> dict:
+    pygame.init()
+    screen = pygame.display.set_mode((800, 400))
+    results = {}
+    bench_startup(results, quick)
+    bench_area(screen, results, quick)
+    bench_pendulum(results, quick)
+    bench_graph(results, quick)
+    bench_table(screen, results, quick)
+    bench_frames(results, quick)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {
+            name: {"ms": round(ms, 4), "budget_ms": round(budget, 2), "budget_share": round(ms / budget, 4)}
+            for name, (ms, budget) in results.items()
+        }
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    # Замедления больше чем в (1 + threshold) раз относительно сохраненного отчета.
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is not None and result["ms"] > old["ms"] * (1 + threshold):
+            regressions.append((name, old["ms"], result["ms"]))
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    print(f"{'замер':<32}{'мс':>12}{'бюджет, мс':>12}{'доля':>9}")
+    for name, result in report["results"].items():
+        print(f"{name:<32}{result['ms']:>12.4f}{result['budget_ms']:>12.2f}{result['budget_share']:>9.1%}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности без окна")
+    parser.add_argument("--save", help="сохранить отчет в JSON")
+    parser.add_argument("--compare", help="сравнить с сохраненным JSON-отчетом")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление, доля")
+    parser.add_argument("--quick", action="store_true", help="меньше повторов")
+    args = parser.parse_args(argv)
+
+    report = run(args.quick)
+    print_report(report)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, old, new in regressions:
+            print(f"ЗАМЕДЛЕНИЕ {name}: {old:.4f} -> {new:.4f} мс", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import math
+
+import numpy as np
+import pygame
+
+from coupled_chain_model import CoupledChain
+from frame_profiler import PROFILER
+from graph_drawer import open_graph
+from point import Point
+from recording import RecordingWriter
+from sim_clock import SimulationClock, seek_ticks
+
+PI = math.pi
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRAY = (120, 120, 120)
+ORANGE = (255, 140, 0)
+
+
+class CoupledChainDrawer(pygame.sprite.DirtySprite):
+    fps = 20
+    # Если элементов больше, бусины не рисуются: цепочка видна как волна.
+    maximal_beads = 80
+
+    def __init__(self, center: Point, width: int, count: int, period: float, coupling: float, amplitude: float, screen,
+                 boundary: str = "free", chain: "CoupledChain" = None, graphs: bool | str = True) -> None:
+        # chain позволяет подставить заранее настроенную модель, например с разными периодами элементов.
+        # graphs - чем рисовать графики (graph_drawer.BACKENDS), False - без графиков.
+        self.chain = chain if chain is not None else CoupledChain(count, period, coupling, amplitude, boundary)
+        self.center = center
+        self.width = width
+        self.screen = screen
+        self.limit = self.chain.displacement_limit
+        self.init_pg_sprite()
+
+        self.graph_drawer = open_graph(graphs, self.limit+10, self.limit+10, "Первый элемент", "Последний элемент")
+        # Прибавляем по 10 к каждому значению, чтобы графики не "упирались" в границы.
+        self.clock = SimulationClock(self.chain.time_step)
+        self.recorder: RecordingWriter = None
+        self.recorded_ticks = self.chain.ticks
+        self.processed_ticks = self.chain.ticks
+
+    @property
+    def model(self) -> CoupledChain:
+        return self.chain
+
+    def describe(self) -> dict:
+        # Все, что нужно, чтобы по записи заново построить такой же рисовальщик.
+        return {
+            "kind": "chain",
+            "center": [self.center.x, self.center.y],
+            "width": self.width,
+            "count": self.chain.count,
+            "period": np.asarray(self.chain.period, dtype=float).tolist(),
+            "coupling": np.asarray(self.chain.coupling, dtype=float).tolist(),
+            "amplitude": self.chain.amplitude,
+            "boundary": self.chain.boundary,
+            "time_step": self.chain.time_step,
+            "columns": ["first", "last"],
+        }
+
+    def components(self) -> list:
+        return [self, *self.graph_drawer.components()]
+
+    def init_pg_sprite(self):
+        pygame.sprite.DirtySprite.__init__(self)
+        self.layer = 1
+        self.bead_radius = max(2, min(8, self.width // (3 * self.chain.count)))
+        margin = self.bead_radius + 1
+        self.xs = np.rint(np.linspace(margin, self.width + margin, self.chain.count)).astype(int)
+        self.image = pygame.Surface((self.width + 2 * margin, 2 * (math.ceil(self.limit) + margin)))
+        self.image.set_colorkey(BLACK)
+        self.rect = self.image.get_rect(center=(self.center.x, self.center.y))
+        self.draw_chain()
+
+    def update(self, elapsed: float = None) -> None:
+        # elapsed - реальное время кадра в секундах. Без него цепочка делает один шаг за кадр.
+        steps = 1 if elapsed is None else self.clock.advance(elapsed)
+        steps = max(steps, -self.chain.ticks) # назад не дальше начала
+        if not steps:
+            return
+        self.chain.process(steps)
+        with PROFILER.stage("CoupledChain.draw"):
+            self.draw_chain()
+        if steps > 0:
+            self.process_ticks()
+            self.draw_graph()
+        else:
+            self.draw_graph_history()
+
+    def draw_chain(self) -> None:
+        # Смещение откладывается по вертикали, нулевое положение - горизонтальная ось картинки.
+        middle = self.image.get_height() // 2
+        ys = middle - np.rint(np.clip(self.chain.displacement, -self.limit, self.limit)).astype(int)
+        points = np.column_stack((self.xs, ys)).tolist()
+        self.image.fill(BLACK)
+        pygame.draw.line(self.image, GRAY, (self.xs[0], middle), (self.xs[-1], middle))
+        if len(points) > 1:
+            pygame.draw.lines(self.image, WHITE, False, points)
+        if self.chain.count <= self.maximal_beads:
+            for point in points:
+                pygame.draw.circle(self.image, ORANGE, point, self.bead_radius)
+        self.dirty = 1
+
+    def draw_graph(self) -> None:
+        first, last = self.chain.displacement[[0, -1]]
+        with PROFILER.stage("GraphDrawer.update"):
+            self.graph_drawer.update(self.chain.timer, first, last)
+
+    def draw_graph_history(self) -> None:
+        # После перемотки или при обратном воспроизведении история графика строится заново.
+        start = max(self.chain.ticks - round(self.graph_drawer.time_limit / 2 / self.chain.time_step), 0)
+        times = np.arange(start, self.chain.ticks + 1) * self.chain.time_step
+        displacement = self.chain.evaluate(times, nodes=[0, -1])[0]
+        self.graph_drawer.reset(times, displacement[:, 0], displacement[:, 1])
+        self.processed_ticks = self.chain.ticks
+
+    def seek(self, time: float) -> None:
+        self.chain.process(seek_ticks(self.chain, time) - self.chain.ticks)
+        self.draw_chain()
+        self.draw_graph_history()
+
+    def start_recording(self, path: str) -> None:
+        self.recorder = RecordingWriter(path, self.describe())
+        self.recorded_ticks = self.chain.ticks
+
+    def process_ticks(self) -> None:
+        # В запись идут первый и последний элементы на каждом тике; всю цепочку по ним восстанавливает модель.
+        ticks = np.arange(self.processed_ticks + 1, self.chain.ticks + 1)
+        if self.recorder is not None:
+            new = ticks[ticks > self.recorded_ticks]
+            times = new * self.chain.time_step
+            displacement = self.chain.evaluate(times, nodes=[0, -1])[0]
+            first, last = displacement[:, 0], displacement[:, 1]
+            self.recorder.append(new, times, first, last, np.rint(first), np.rint(last))
+            self.recorded_ticks = max(self.recorded_ticks, self.chain.ticks)
+        self.processed_ticks = self.chain.ticks
+
+    def abort(self):
+        self.graph_drawer.close()
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,241 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from phase_rotator import PhaseRotator
+
+PI = math.pi
+
+# Цепочка одинаковых (или разных) осцилляторов, связанных с соседями пружинами или взаимной индуктивностью:
+# x_i'' = -ω_i²·x_i - κ_(i-1)·(x_i - x_(i-1)) - κ_i·(x_i - x_(i+1)).
+# Матрица системы трехдиагональная. Она раскладывается по нормальным модам один раз,
+# после чего состояние в любой момент - сумма мод, без шагов по времени.
+# У одинаковых элементов моды - синусы или косинусы, и сумма мод считается быстрым
+# преобразованием (DST/DCT) за O(N log N), без матрицы N×N.
+# boundary="free" - крайние элементы связаны только с одним соседом,
+# "fixed" - за краями цепочки есть неподвижные точки, к которым они тоже привязаны.
+
+
+class CoupledChain:
+    def __init__(self, count: int, period, coupling, amplitude: float = 30., boundary: str = "free",
+                 initial_displacement=None, initial_velocity=None) -> None:
+        # period - период одного осциллятора без связи (число или массив длины count),
+        # coupling - жесткость связи в 1/с² (число или массив длины count - 1).
+        # По умолчанию в начальный момент отклонен только первый элемент.
+        self.count = count
+        self.period = period
+        self.coupling = coupling
+        self.amplitude = amplitude
+        self.boundary = boundary
+
+        if initial_displacement is None:
+            initial_displacement = np.zeros(count)
+            initial_displacement[0] = amplitude
+        if initial_velocity is None:
+            initial_velocity = np.zeros(count)
+        self.initial_displacement = np.asarray(initial_displacement, dtype=float)
+        self.initial_velocity = np.asarray(initial_velocity, dtype=float)
+
+        self.frequencies, self.modes = chain_modes(count, as_key(2 * PI / np.asarray(period, dtype=float)), as_key(coupling), boundary)
+        # Разложение начальных условий по модам: x = Σ V_k·(a_k·cos ω_k t + b_k·sin ω_k t).
+        self.cos_amplitudes = self.modes.analyze(self.initial_displacement)
+        self.sin_amplitudes = self.modes.analyze(self.initial_velocity) / self.frequencies
+
+        self.time_step: float = 0.05 # Шаг по времени за один тик.
+        self.ticks: int = 0
+        self.timer: float = 0.
+        self.rotator: PhaseRotator = None
+        self.state_ticks: int = None
+
+    def process(self, steps: int = 1) -> None:
+        self.add_time(steps)
+
+    def add_time(self, steps: int = 1) -> None:
+        # Время считаем от целого числа тиков, чтобы не накапливалась ошибка сложения float.
+        self.ticks += steps
+        self.timer = self.ticks * self.time_step
+
+    def evaluate(self, times, nodes=None) -> tuple:
+        # Смещения и скорости формы (len(times), число узлов). nodes - индексы нужных элементов,
+        # тогда суперпозиция считается только для них.
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        phase = times[:, None] * self.frequencies
+        cos, sin = np.cos(phase), np.sin(phase)
+        displacement = cos * self.cos_amplitudes + sin * self.sin_amplitudes
+        velocity = (cos * self.sin_amplitudes - sin * self.cos_amplitudes) * self.frequencies
+        if nodes is None:
+            return self.modes.synthesize(displacement), self.modes.synthesize(velocity)
+        rows = self.modes.rows(nodes)
+        return displacement @ rows.T, velocity @ rows.T
+
+    def state(self) -> tuple:
+        # Смещения и скорости всех элементов в текущий тик, один раз за тик.
+        # Моды поворачиваются все сразу умножением, без cos и sin для каждой частоты.
+        if self.state_ticks != self.ticks:
+            if self.rotator is None or self.rotator.step != self.time_step:
+                self.rotator = PhaseRotator(self.frequencies, self.time_step)
+            phasor = self.rotator.at(self.ticks)
+            cos, sin = phasor.real, phasor.imag
+            self.current_state = (
+                self.modes.synthesize(cos * self.cos_amplitudes + sin * self.sin_amplitudes),
+                self.modes.synthesize((cos * self.sin_amplitudes - sin * self.cos_amplitudes) * self.frequencies)
+            )
+            self.state_ticks = self.ticks
+        return self.current_state
+
+    @property
+    def displacement(self) -> np.ndarray:
+        return self.state()[0]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self.state()[1]
+
+    @property
+    def displacement_limit(self) -> float:
+        # Оценка сверху для любого элемента в любой момент.
+        amplitudes = np.hypot(self.cos_amplitudes, self.sin_amplitudes)
+        return float(min(self.modes.peak * amplitudes.sum(), np.linalg.norm(amplitudes)))
+
+
+def as_key(value):
+    # lru_cache требует хешируемых аргументов: массив превращается в кортеж, одинаковые значения - в число.
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 0 or np.all(value == value.flat[0]):
+        return float(value.flat[0])
+    return tuple(value.tolist())
+
+
+@lru_cache(maxsize=4)
+def chain_modes(count: int, natural_frequency, coupling, boundary: str = "free") -> tuple:
+    # Частоты мод и ортонормированные векторы мод, общие для всех цепочек с такой конфигурацией.
+    if isinstance(natural_frequency, float) and isinstance(coupling, float):
+        frequencies, modes = uniform_chain_modes(count, natural_frequency, coupling, boundary)
+    else:
+        frequencies, matrix = tridiagonal_modes(*chain_matrix(count, natural_frequency, coupling, boundary))
+        modes = ModeMatrix(matrix)
+    frequencies.flags.writeable = False
+    return frequencies, modes
+
+
+class ModeMatrix:
+    # Векторы мод - столбцы матрицы. synthesize и analyze работают по последней оси,
+    # поэтому годятся и для одного вектора, и для таблицы "моменты x моды".
+    def __init__(self, matrix: np.ndarray) -> None:
+        self.matrix = matrix
+        self.matrix.flags.writeable = False
+        self.peak = float(np.abs(matrix).max()) # Наибольший по модулю элемент среди всех мод.
+
+    def synthesize(self, amplitudes) -> np.ndarray:
+        # Значения в узлах по амплитудам мод.
+        return amplitudes @ self.matrix.T
+
+    def analyze(self, values) -> np.ndarray:
+        # Амплитуды мод по значениям в узлах.
+        return values @ self.matrix
+
+    def rows(self, nodes) -> np.ndarray:
+        # Строки матрицы для узлов nodes: когда нужны только они, сумма мод дешевле.
+        return self.matrix[nodes]
+
+
+class UniformModes:
+    # Моды одинаковых элементов в явном виде: fixed - V_ik = √(2/(N+1))·sin(πk(i+1)/(N+1)), k = 1..N,
+    # free - V_ik = √(2/N)·cos(πk(i+1/2)/N), k = 0..N-1, нулевая мода 1/√N.
+    # Умножение на такую матрицу - ортонормированное DST-I (fixed) или DCT-III (free),
+    # обратное - то же DST-I или DCT-II. Интерфейс как у ModeMatrix.
+    def __init__(self, count: int, boundary: str) -> None:
+        self.count = count
+        self.fixed = boundary == "fixed"
+        try:
+            # Готовые преобразования из scipy быстрее, но scipy необязателен: без нее - те же формулы через np.fft.
+            import scipy.fft
+        except ImportError:
+            self.scipy = None
+        else:
+            self.scipy = scipy.fft
+        if self.fixed:
+            self.peak = math.sqrt(2 / (count + 1)) * math.sin(PI * ((count + 1) // 2) / (count + 1))
+        elif count == 1:
+            self.peak = 1.
+        else:
+            # cos(πp/2N) с p = k(2i+1) доходит до ±1, только если у N есть нечетный делитель.
+            self.peak = math.sqrt(2 / count) * (math.cos(PI / (2 * count)) if count & (count - 1) == 0 else 1.)
+
+    def synthesize(self, amplitudes) -> np.ndarray:
+        amplitudes = np.asarray(amplitudes, dtype=float)
+        if self.fixed:
+            return self.sine(amplitudes)
+        if self.scipy is not None:
+            return self.scipy.dct(amplitudes, type=3, norm="ortho")
+        n = self.count
+        k = np.arange(n)
+        weights = np.where(k == 0, math.sqrt(1 / n), math.sqrt(2 / n)) * np.exp(1j * PI * k / (2 * n))
+        return (2 * n * np.fft.ifft(amplitudes * weights, n=2 * n)).real[..., :n]
+
+    def analyze(self, values) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        if self.fixed:
+            return self.sine(values)
+        if self.scipy is not None:
+            return self.scipy.dct(values, type=2, norm="ortho")
+        n = self.count
+        k = np.arange(n)
+        weights = np.where(k == 0, math.sqrt(1 / n), math.sqrt(2 / n)) * np.exp(-1j * PI * k / (2 * n))
+        return (np.fft.fft(values, n=2 * n)[..., :n] * weights).real
+
+    def sine(self, values: np.ndarray) -> np.ndarray:
+        # Ортонормированное DST-I, само себе обратное. Через FFT - по нечетному продолжению длины 2(N+1).
+        if self.scipy is not None:
+            return self.scipy.dst(values, type=1, norm="ortho")
+        n = self.count
+        extended = np.zeros(values.shape[:-1] + (2 * (n + 1),))
+        extended[..., 1:n + 1] = values
+        extended[..., n + 2:] = -values[..., ::-1]
+        return -np.fft.rfft(extended)[..., 1:n + 1].imag * math.sqrt(1 / (2 * (n + 1)))
+
+    def rows(self, nodes) -> np.ndarray:
+        i = np.arange(self.count)[nodes][..., None]
+        if self.fixed:
+            k = np.arange(1, self.count + 1)
+            return math.sqrt(2 / (self.count + 1)) * np.sin(PI * k * (i + 1) / (self.count + 1))
+        k = np.arange(self.count)
+        return np.where(k == 0, math.sqrt(1 / self.count), math.sqrt(2 / self.count) * np.cos(PI * k * (i + 0.5) / self.count))
+
+
+def uniform_chain_modes(count: int, natural_frequency: float, coupling: float, boundary: str) -> tuple:
+    # Для одинаковых элементов моды известны в явном виде, собственная задача не решается.
+    if boundary == "fixed":
+        k = np.arange(1, count + 1)
+        laplacian = 4 * np.sin(PI * k / (2 * (count + 1))) ** 2
+    else:
+        k = np.arange(count)
+        laplacian = 4 * np.sin(PI * k / (2 * count)) ** 2
+    return np.sqrt(natural_frequency ** 2 + coupling * laplacian), UniformModes(count, boundary)
+
+
+def chain_matrix(count: int, natural_frequency, coupling, boundary: str) -> tuple:
+    # Матрица хранится двумя диагоналями: главной и соседней.
+    frequencies = np.broadcast_to(np.asarray(natural_frequency, dtype=float), (count,))
+    couplings = np.broadcast_to(np.asarray(coupling, dtype=float), (count - 1,))
+    diagonal = frequencies ** 2
+    diagonal[:-1] += couplings
+    diagonal[1:] += couplings
+    if boundary == "fixed":
+        # Крайние элементы привязаны к стенкам так же жестко, как к своему соседу.
+        diagonal[0] += couplings[0]
+        diagonal[-1] += couplings[-1]
+    return diagonal, -couplings
+
+
+def tridiagonal_modes(diagonal, off_diagonal) -> tuple:
+    try:
+        # Специальный решатель для трехдиагональных матриц заметно быстрее, но scipy необязателен.
+        from scipy.linalg import eigh_tridiagonal
+    except ImportError:
+        matrix = np.diag(diagonal) + np.diag(off_diagonal, 1) + np.diag(off_diagonal, -1)
+        eigenvalues, modes = np.linalg.eigh(matrix)
+    else:
+        eigenvalues, modes = eigh_tridiagonal(diagonal, off_diagonal)
+    return np.sqrt(eigenvalues), modes
@@ -1,11 +1,18 @@
 import math
-import os
+from functools import lru_cache
 
+import numpy as np
 import pygame
-from pygame import gfxdraw
 
-from graph_drawer import GraphDrawer
+from assets import ASSETS
+from frame_profiler import PROFILER
+from graph_drawer import open_graph
+from electronic_oscillator_model import ElectronicOscillator
+from phase_portrait import PhasePortrait
 from point import Point
+from recording import RecordingWriter
+from sim_clock import SimulationClock, seek_ticks
+from spectrum import ModelSpectrum
 
 PI = math.pi
 BLACK = (0, 0, 0)
@@ -13,113 +20,181 @@ PURPLE = (139, 0, 255)
 BLUE = (0, 0, 255)
 
 
-class ElectronicOscillatorDrawer(pygame.sprite.Sprite):
-    def __init__(self, center: Point, maximal_charge: float, period: float, sprite: str, screen) -> None:
-        self.electronic_osciliator = ElectronicOscillator(maximal_charge, period)
+class ElectronicOscillatorDrawer(pygame.sprite.DirtySprite):
+    fps = 15
+
+    def __init__(self, center: Point, maximal_charge: float, period: float, sprite: str, screen, smooth_areas: bool = False, oscillator: "ElectronicOscillator" = None,
+                 graphs: bool | str = True) -> None:
+        # oscillator позволяет подставить заранее настроенную модель, например с сопротивлением и источником.
+        # graphs - чем рисовать графики (graph_drawer.BACKENDS), False - без графиков.
+        self.electronic_osciliator = oscillator if oscillator is not None else ElectronicOscillator(maximal_charge, period)
         self.init_pg_sprite(center, sprite)
 
-        self.graph_drawer = GraphDrawer(self.electronic_osciliator.maximal_charge+10, self.electronic_osciliator.maximal_amerage+10, "Заряд", "Сила тока")
+        self.graph_drawer = open_graph(graphs, self.electronic_osciliator.charge_limit+10, self.electronic_osciliator.amperage_limit+10, "Заряд", "Сила тока")
         # Прибавляем по 10 к каждому значению, чтобы графики не "упирались" в границы.
 
         self.inductor_coil_distacne: int = 120
         self.capacitor_distance: int = 120
 
-        self.init_areas(center, screen)
+        self.screen = screen
+        self.center = center
+        self.sprite_name = sprite
+        self.init_areas(center, screen, smooth_areas)
+        self.clock = SimulationClock(self.electronic_osciliator.time_step)
+        self.recorder: RecordingWriter = None
+        self.recorded_ticks = self.electronic_osciliator.ticks
+        self.spectrum = ModelSpectrum(self.electronic_osciliator)
+        self.processed_ticks = self.electronic_osciliator.ticks
+        # Фазовый портрет "заряд - сила тока" (клавиша P).
+        self.portrait = PhasePortrait(
+            self.electronic_osciliator.charge_limit * 1.25,
+            self.electronic_osciliator.amperage_limit * 1.25,
+            (center.x, screen.get_height() - 5)
+        )
+
+    @property
+    def model(self) -> ElectronicOscillator:
+        return self.electronic_osciliator
+
+    def describe(self) -> dict:
+        # Все, что нужно, чтобы по записи заново построить такой же рисовальщик.
+        oscillator = self.electronic_osciliator
+        return {
+            "kind": "electronic",
+            "center": [self.center.x, self.center.y],
+            "maximal_charge": oscillator.maximal_charge,
+            "period": oscillator.period,
+            "resistance": oscillator.resistance,
+            "inductance": oscillator.inductance,
+            "source_voltage": oscillator.source_voltage,
+            "source_frequency": oscillator.source_frequency,
+            "time_step": oscillator.time_step,
+            "sprite": self.sprite_name,
+            "columns": ["charge", "amperage"],
+        }
+
+    def components(self) -> list:
+        # Спрайты для LayeredDirty: области поля под схемой контура.
+        return [self.charge_area, self.amperage_area, self, self.portrait, *self.graph_drawer.components()]
 
     def init_pg_sprite(self, center, sprite):
-        pygame.sprite.Sprite.__init__(self)
-        self.game_folder = os.path.dirname(__file__)
-        self.img_folder = os.path.join(self.game_folder, "sprites")
-        self.image = pygame.image.load(os.path.join(self.img_folder, sprite)).convert()
-        self.image.set_colorkey(BLACK)
+        pygame.sprite.DirtySprite.__init__(self)
+        self.layer = 1
+        self.image = ASSETS.image(sprite)
 
         self.rect = self.image.get_rect()
         self.rect.center = (center.x, center.y)
 
-    def init_areas(self, center, screen):
+    def init_areas(self, center, screen, smooth=False):
         self.amperage_area = Area(
             Point(center.x + self.inductor_coil_distacne, center.y),
             0,
             PURPLE,
-            screen
+            screen,
+            smooth
         )
         self.charge_area = Area(
             Point(center.x - self.capacitor_distance, center.y),
             0,
             BLUE,
-            screen
+            screen,
+            smooth
         )
 
-    def update(self):
-        self.electronic_osciliator.process()
+    def update(self, elapsed: float = None):
+        # elapsed - реальное время кадра в секундах. Без него контур делает один шаг за кадр.
+        steps = 1 if elapsed is None else self.clock.advance(elapsed)
+        steps = max(steps, -self.electronic_osciliator.ticks) # назад не дальше начала
+        if steps:
+            self.electronic_osciliator.process(steps)
         self.update_areas()
-        self.update_graph()
+        if steps > 0:
+            self.process_ticks()
+            self.update_graph()
+            self.portrait.update()
+        elif steps < 0:
+            self.draw_graph_history()
 
     def update_areas(self):
         self.charge_area.set_radius(int(abs(round(self.electronic_osciliator.charge))))
         self.amperage_area.set_radius(int(abs(round(self.electronic_osciliator.amperage))))
-        self.charge_area.update()
-        self.amperage_area.update()
+        with PROFILER.stage("Area.update"):
+            self.charge_area.update()
+            self.amperage_area.update()
 
     def update_graph(self):
-        self.graph_drawer.update(
-            self.electronic_osciliator.timer,
-            self.electronic_osciliator.charge,
-            self.electronic_osciliator.amperage
-        )
+        labels = self.spectrum.labels()
+        if labels is not None:
+            self.graph_drawer.set_info(*labels)
+        with PROFILER.stage("GraphDrawer.update"):
+            self.graph_drawer.update(
+                self.electronic_osciliator.timer,
+                self.electronic_osciliator.charge,
+                self.electronic_osciliator.amperage
+            )
+
+    def draw_graph_history(self) -> None:
+        # После перемотки или при обратном воспроизведении история графика строится заново.
+        oscillator = self.electronic_osciliator
+        start = max(oscillator.ticks - round(self.graph_drawer.time_limit / 2 / oscillator.time_step), 0)
+        times = np.arange(start, oscillator.ticks + 1) * oscillator.time_step
+        charge, amperage = oscillator.evaluate(times)
+        self.spectrum.restart()
+        self.processed_ticks = oscillator.ticks
+        labels = self.spectrum.labels()
+        if labels is not None:
+            self.graph_drawer.set_info(*labels)
+        self.graph_drawer.reset(times, charge, amperage)
+
+    def seek(self, time: float) -> None:
+        self.electronic_osciliator.process(seek_ticks(self.electronic_osciliator, time) - self.electronic_osciliator.ticks)
+        self.update_areas()
+        self.draw_graph_history()
+
+    def start_recording(self, path: str) -> None:
+        self.recorder = RecordingWriter(path, self.describe())
+        self.recorded_ticks = self.electronic_osciliator.ticks
+
+    def process_ticks(self) -> None:
+        # Все тики с прошлого кадра, даже если их прошло несколько: одним вызовом evaluate для спектра и для записи.
+        ticks = np.arange(self.processed_ticks + 1, self.electronic_osciliator.ticks + 1)
+        if not len(ticks):
+            return
+        times = ticks * self.electronic_osciliator.time_step
+        charge, amperage = self.electronic_osciliator.evaluate(times)
+        with PROFILER.stage("spectrum.update"):
+            self.spectrum.extend(charge, amperage)
+        self.portrait.add(charge, amperage)
+        if self.recorder is not None:
+            self.record(ticks, times, charge, amperage)
+        self.processed_ticks = self.electronic_osciliator.ticks
+
+    def record(self, ticks, times, charge, amperage) -> None:
+        # Уже записанные тики (после перемотки назад) пропускаем, чтобы время в записи только росло.
+        new = ticks > self.recorded_ticks
+        radii = np.abs(np.rint(charge[new])), np.abs(np.rint(amperage[new]))
+        self.recorder.append(ticks[new], times[new], charge[new], amperage[new], *radii)
+        self.recorded_ticks = max(self.recorded_ticks, self.electronic_osciliator.ticks)
 
     def abort(self):
         self.graph_drawer.close()
+        if self.recorder is not None:
+            self.recorder.close()
 
     def get_data_for_table(self, interval: float) -> list:
-        previos_time = self.electronic_osciliator.timer
-        i = 0
-        ans = []
-        while i <= self.electronic_osciliator.period:
-            self.electronic_osciliator.timer = i
-            data = {
-                "time": i,
-                "charge": self.electronic_osciliator.charge,
-                "amperage": self.electronic_osciliator.amperage
-            }
-            ans.append(data)
-            i += interval * self.electronic_osciliator.period
-        self.electronic_osciliator.timer = previos_time
-        return ans
-
-
-class ElectronicOscillator:
-    def __init__(self, maximal_charge: float, period: float) -> None:
-        self.maximal_charge = maximal_charge
-        self.period = period
-
-        self.timer: float = 0
-
-    def process(self) -> None:
-        self.add_time()
-
-    def add_time(self) -> None:
-        self.timer += 0.066 # Т.к. обнвление кадра происходит 15 раз в сек. добаляем 1 / 15
-
-    @property
-    def charge(self) -> float:
-        return self.maximal_charge * math.cos(self.cyclic_frequency * self.timer)
-
-    @property
-    def amperage(self) -> float:
-        return -self.maximal_amerage * math.sin(self.cyclic_frequency * self.timer)
-
-    @property
-    def maximal_amerage(self) -> float:
-        return self.cyclic_frequency * self.maximal_charge
-
-    @property
-    def cyclic_frequency(self) -> float:
-        return 2 * PI / self.period
-
-
-class Area:
-    def __init__(self, center: Point, radius: int, maximal_color: tuple, screen) -> None:
+        steps = math.floor(1 / interval + 1e-9)
+        times = np.arange(steps + 1) * interval * self.electronic_osciliator.period
+        charge, amperage = self.electronic_osciliator.evaluate(times)
+        return [
+            {"time": t, "charge": q, "amperage": i}
+            for t, q, i in zip(times.tolist(), charge.tolist(), amperage.tolist())
+        ]
+
+
+class Area(pygame.sprite.DirtySprite):
+    def __init__(self, center: Point, radius: int, maximal_color: tuple, screen, smooth: bool = False) -> None:
+        super().__init__()
+        self.layer = 0
         self.center = center
         self.radius = radius
         self.width = self.radius * 2
@@ -127,9 +202,12 @@ class Area:
         self.screen = screen
 
         self.make_corners()
-        self.sqaure: int = 5
-        # В целях оптимизации, мы отрисовывавем не каждый пиксель, а "квадраты".
-        # Все вычесление производятся для центра квадрата. self.square - это длинна стороны такого квадрата.
+        self.sqaure: int = 1 if smooth else 5
+        # Яркость считается для центра "квадрата" со стороной self.sqaure.
+        # При smooth=True квадрат вырождается в пиксель и градиент получается гладким.
+        self.image = pygame.Surface((0, 0))
+        self.rect = pygame.Rect(self.left_corner.x, self.left_corner.y, 0, 0)
+        self.drawn_radius = None
 
     def make_corners(self):
         self.left_corner = Point(
@@ -147,29 +225,27 @@ class Area:
         self.radius = value
         self.make_corners()
 
-    def update(self):
-        for y in range(self.left_corner.y, self.right_corner.y+1, self.sqaure):
-            for x in range(self.left_corner.x, self.right_corner.x+1, self.sqaure):
-                self.draw_area(x, y)
-
-    def draw_area(self, x, y):
-        distance = self.get_distance(x+self.sqaure/2, y+self.sqaure/2)
-        ratio = -(distance/self.radius)**2 + 1 # Формула, выведенная мной для вычисления яркости.
-        red, green, blue = self.maximal_color
-        red *= ratio
-        green *= ratio
-        blue *= ratio
-        self.draw_square(x, y, (red, green, blue))
-
-    def get_distance(self, x, y):
-        x_distance = self.center.x - x
-        y_distance = self.center.y - y
-        result = math.sqrt(
-            x_distance ** 2 + y_distance ** 2
-        )
-        return result if result <= self.radius else self.radius
-
-    def draw_square(self, x, y, color):
-        for i in range(y, y+self.sqaure):
-            for j in range(x, x+self.sqaure):
-                gfxdraw.pixel(self.screen, j, i, color)
+    def update(self, *args):
+        # Картинка меняется только вместе с радиусом, иначе область не помечается грязной.
+        if self.radius == self.drawn_radius:
+            return
+        self.drawn_radius = self.radius
+        self.image = gradient_surface(self.radius, tuple(self.maximal_color), self.sqaure)
+        self.rect = self.image.get_rect(topleft=(self.left_corner.x, self.left_corner.y))
+        self.dirty = 1
+
+
+@lru_cache(maxsize=512)
+def gradient_surface(radius: int, maximal_color: tuple, square: int) -> pygame.Surface:
+    # Квадраты идут от левого угла с шагом square, последний может выходить за правый угол,
+    # поэтому сторона поверхности кратна square.
+    blocks = (2 * radius) // square + 1
+    offsets = np.arange(blocks) * square + square / 2 - radius
+    distance = np.minimum(np.hypot(offsets[:, None], offsets[None, :]), radius)
+    ratio = -(distance / radius) ** 2 + 1 # Формула, выведенная мной для вычисления яркости.
+
+    pixels = (ratio[:, :, None] * np.array(maximal_color, dtype=float)).astype(np.uint8)
+    if square > 1:
+        pixels = pixels.repeat(square, axis=0).repeat(square, axis=1)
+    surface = pygame.surfarray.make_surface(pixels)
+    return surface.convert() if pygame.display.get_surface() is not None else surface
@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+
+from phase_rotator import PhaseRotator
+from rlc_solver import solve_rlc, steady_state
+
+PI = math.pi
+
+
+class ElectronicOscillator:
+    def __init__(self, maximal_charge: float, period: float, resistance: float = 0., inductance: float = 1.,
+                 source_voltage: float = 0., source_frequency: float = 0.) -> None:
+        # period - период собственных колебаний идеального контура, maximal_charge - заряд при t = 0.
+        # resistance, inductance и источник переменного напряжения E0·cos(Ωt) необязательны.
+        self.maximal_charge = maximal_charge
+        self.period = period
+        self.resistance = resistance
+        self.inductance = inductance
+        self.source_voltage = source_voltage
+        self.source_frequency = source_frequency
+
+        self.time_step: float = 0.066 # Шаг по времени за один тик.
+        self.ticks: int = 0
+        self.timer: float = 0
+        self.update_constants()
+
+    def process(self, steps: int = 1) -> None:
+        self.add_time(steps)
+
+    def add_time(self, steps: int = 1) -> None:
+        # Время считаем от целого числа тиков, чтобы не накапливалась ошибка сложения float.
+        self.ticks += steps
+        self.timer = self.ticks * self.time_step
+
+    def evaluate(self, times, period=None, maximal_charge=None) -> tuple:
+        # Заряд и сила тока для массива моментов времени, состояние объекта не меняется.
+        # period и maximal_charge могут быть массивами и broadcast-ятся с times по правилам numpy.
+        period = self.period if period is None else np.asarray(period, dtype=float)
+        maximal_charge = self.maximal_charge if maximal_charge is None else np.asarray(maximal_charge, dtype=float)
+        return solve_rlc(
+            times,
+            2 * PI / period,
+            self.damping,
+            maximal_charge,
+            self.source_voltage / self.inductance,
+            self.source_frequency
+        )
+
+    def update_constants(self) -> None:
+        # Величины, которые зависят только от параметров. После изменения параметров контура вызвать заново.
+        self.cyclic_frequency = 2 * PI / self.period
+        self.maximal_amerage = self.cyclic_frequency * self.maximal_charge
+        self.damping = self.resistance / (2 * self.inductance)
+        # Резонанс без затухания: амплитуда растет линейно, установившегося режима нет - считаем по solve_rlc.
+        self.resonant = not self.damping and self.source_frequency == self.cyclic_frequency
+        amplitude, phase = (0., 0.) if self.resonant else steady_state(
+            self.cyclic_frequency, self.damping,
+            self.source_voltage / self.inductance, self.source_frequency
+        )
+        self.forced_amplitude = float(amplitude)
+        # Как в solve_rlc: в колебательном режиме свободная часть e^(-βt)·(a·cos ωd·t + c·sin ωd·t / ωd),
+        # вынужденная A·cos(Ωt - φ). Обе - повороты комплексных чисел, поэтому тик обходится без cos и sin.
+        self.forced_shift = complex(math.cos(phase), -math.sin(phase))
+        a = self.maximal_charge - self.forced_amplitude * math.cos(phase)
+        b = -self.forced_amplitude * self.source_frequency * math.sin(phase)
+        self.free_coefficients = a, b + self.damping * a
+        self.free_frequency = math.sqrt(max(self.cyclic_frequency ** 2 - self.damping ** 2, 0))
+        self.free_rotator: PhaseRotator = None
+        self.forced_rotator: PhaseRotator = None
+        self.state_ticks: int = None
+
+    def state(self) -> tuple:
+        # Заряд и сила тока в текущий тик. Считаются один раз за тик, а области, графики и запись берут готовые.
+        if self.state_ticks != self.ticks:
+            self.current_state = self.compute_state()
+            self.state_ticks = self.ticks
+        return self.current_state
+
+    def compute_state(self) -> tuple:
+        if not self.free_frequency or self.resonant:
+            # Апериодический режим, критическое затухание и резонанс без затухания - по точному решению.
+            charge, amperage = self.evaluate(self.timer)
+            return float(charge), float(amperage)
+        if self.free_rotator is None or self.free_rotator.step != self.time_step:
+            self.free_rotator = PhaseRotator(self.free_frequency, self.time_step, self.damping)
+            self.forced_rotator = PhaseRotator(self.source_frequency, self.time_step)
+        a, c = self.free_coefficients
+        free = self.free_rotator.at(self.ticks)
+        charge = a * free.real + c / self.free_frequency * free.imag
+        amperage = -self.damping * charge - a * self.free_frequency * free.imag + c * free.real
+        if self.forced_amplitude:
+            forced = self.forced_rotator.at(self.ticks) * self.forced_shift
+            charge += self.forced_amplitude * forced.real
+            amperage -= self.forced_amplitude * self.source_frequency * forced.imag
+        return float(charge), float(amperage)
+
+    @property
+    def charge(self) -> float:
+        return self.state()[0]
+
+    @property
+    def amperage(self) -> float:
+        return self.state()[1]
+
+    @property
+    def charge_limit(self) -> float:
+        # Оценка сверху для заряда: свободные колебания не растут, к ним добавляются вынужденные.
+        # При резонансе без затухания заряд растет неограниченно, и оценка - только для свободной части.
+        return self.maximal_charge + self.forced_amplitude
+
+    @property
+    def amperage_limit(self) -> float:
+        return self.maximal_amerage + self.forced_amplitude * self.source_frequency
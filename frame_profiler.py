@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# Замер стадий кадра. Выключенный профайлер возвращает общий nullcontext,
+# так что "with PROFILER.stage(...)" в цикле стоит лишь вызова метода.
+
+NULL_STAGE = nullcontext()
+
+
+class Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *args) -> None:
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+
+
+class FrameProfiler:
+    def __init__(self, enabled: bool = False, history: int = 300, trace_limit: int = 500_000) -> None:
+        self.enabled = enabled
+        self.hud = False
+        self.history = history
+        self.timings = {} # стадия -> последние history длительностей, мс
+        self.frames = deque(maxlen=history)
+        self.trace = deque(maxlen=trace_limit) # события для chrome://tracing, самые старые отбрасываются
+        self.origin = time.perf_counter_ns()
+        self.frame_start = None
+
+        self.hud_surface = None
+        self.hud_frames = 0
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name)
+
+    def begin_frame(self) -> None:
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+
+    def end_frame(self) -> None:
+        if self.enabled and self.frame_start is not None:
+            end = time.perf_counter_ns()
+            self.frames.append((end - self.frame_start) / 1e6)
+            self.record("frame", self.frame_start, end)
+            self.frame_start = None
+
+    def record(self, name: str, start: int, end: int) -> None:
+        timings = self.timings.get(name)
+        if timings is None:
+            timings = self.timings[name] = deque(maxlen=self.history)
+        timings.append((end - start) / 1e6)
+        self.trace.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1e3,
+            "dur": (end - start) / 1e3,
+            "pid": os.getpid(),
+            "tid": 0,
+        })
+
+    def percentiles(self, name: str, values=(50, 95, 99)) -> tuple:
+        timings = sorted(self.timings.get(name, ()))
+        if not timings:
+            return tuple(0. for _ in values)
+        return tuple(timings[min(len(timings) - 1, len(timings) * i // 100)] for i in values)
+
+    @property
+    def fps(self) -> float:
+        if not self.frames:
+            return 0.
+        return 1000 * len(self.frames) / sum(self.frames)
+
+    def summary(self) -> list:
+        lines = [f"FPS {self.fps:5.1f}"]
+        for name in self.timings:
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f"{name:<22} {p50:6.2f} {p95:6.2f} {p99:6.2f} мс")
+        return lines
+
+    def draw_hud(self, surface, refresh: int = 10):
+        # Текст пересобирается раз в refresh кадров, в остальные кадры только blit.
+        # Возвращает прямоугольник HUD, чтобы его можно было передать в display.update.
+        import pygame
+
+        if self.hud_surface is None or self.hud_frames % refresh == 0:
+            font = pygame.font.Font(None, 20)
+            rendered = [font.render(line, True, (0, 255, 0)) for line in self.summary()]
+            width = max(i.get_width() for i in rendered) + 10
+            height = sum(i.get_height() for i in rendered) + 10
+            self.hud_surface = pygame.Surface((width, height))
+            self.hud_surface.set_alpha(200)
+            y = 5
+            for line in rendered:
+                self.hud_surface.blit(line, (5, y))
+                y += line.get_height()
+        self.hud_frames += 1
+        return surface.blit(self.hud_surface, (0, 0))
+
+    def export_chrome_trace(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": list(self.trace), "displayTimeUnit": "ms"}, f)
+
+
+PROFILER = FrameProfiler()
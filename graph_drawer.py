@@ -1,51 +1,209 @@
-import matplotlib.pyplot as plt
+from frame_profiler import PROFILER
+from history_pyramid import HistoryPyramid
+
+# Самый короткий отрезок времени на графике, в секундах.
+MIN_TIME_LIMIT = 0.5
+# Чем рисовать графики: отдельное окно matplotlib, панель в окне pygame (panel_graph.py) или никак.
+BACKENDS = ("matplotlib", "pygame", "none")
+
+
+def open_graph(backend, y_cos_limit: float, y_sin_limit: float, cos_label: str, sin_label: str):
+    # backend - одно из BACKENDS; True и False, как раньше, означают "matplotlib" и "none".
+    if backend is True:
+        backend = "matplotlib"
+    if backend is False or backend == "none":
+        return NoGraph()
+    if backend == "pygame":
+        from panel_graph import PanelGraph
+
+        return PanelGraph(y_cos_limit, y_sin_limit, cos_label, sin_label)
+    if backend == "matplotlib":
+        return GraphDrawer(y_cos_limit, y_sin_limit, cos_label, sin_label)
+    raise ValueError(f"неизвестный способ рисовать графики {backend!r}")
 
 
 class GraphDrawer:
-    def __init__(self, y_cos_limit: float, y_sin_limit: float, cos_label: str, sin_label: str) -> None:
+    def __init__(self, y_cos_limit: float, y_sin_limit: float, cos_label: str, sin_label: str, blit: bool = True, capacity: int = 4096) -> None:
+        # matplotlib импортируется долго, поэтому только когда действительно нужно окно графиков.
+        import matplotlib.pyplot as plt
+
         plt.ion()
         self.fig = plt.figure()
-        plt.gcf().canvas.set_window_title("Графики")
+        self.fig.canvas.manager.set_window_title("Графики")
 
         self.y_sin_limit = y_sin_limit
         self.y_cos_limit = y_cos_limit
 
         self.time_limit = 15
+        # В режиме blit оси, подписи и сетка рисуются один раз и сохраняются как фон,
+        # а каждый кадр перерисовываются только две линии.
+        self.blit = blit and self.fig.canvas.supports_blit
+        self.background = None
+
+        self.cos_line = Line(self.fig.add_subplot(211), self.time_limit, self.y_cos_limit, "red", cos_label, capacity=capacity, animated=self.blit)
+        self.sin_line = Line(self.fig.add_subplot(212), self.time_limit, self.y_sin_limit, "blue", sin_label, capacity=capacity, animated=self.blit)
+
+        if self.blit:
+            self.fig.canvas.mpl_connect("draw_event", self.on_draw)
+        # Колесо мыши над графиками меняет масштаб по времени.
+        self.fig.canvas.mpl_connect("scroll_event", self.on_scroll)
+        self.fig.canvas.draw()
+
+    def on_draw(self, event) -> None:
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        # Фон перерисован (например, при прокрутке осей) - кэш подписей устарел.
+        self.cos_line.info_pixels = None
+        self.sin_line.info_pixels = None
 
-        self.cos_line = Line(self.fig.add_subplot(211), self.time_limit, self.y_cos_limit, "red", cos_label)
-        self.sin_line = Line(self.fig.add_subplot(212), self.time_limit, self.y_sin_limit, "blue", sin_label)
+    def components(self) -> list:
+        # Спрайтов в окне pygame у графиков matplotlib нет.
+        return []
 
+    def on_scroll(self, event) -> None:
+        self.zoom(0.5 if event.button == "up" else 2)
 
     def update(self, time, new_cos_data, new_sin_data) -> None:
-        if time <= self.time_limit:
-            self.cos_line.add_data(time, new_cos_data)
-            self.sin_line.add_data(time, new_sin_data)
+        self.cos_line.add_data(time, new_cos_data)
+        self.sin_line.add_data(time, new_sin_data)
+
+        scrolled = self.cos_line.scroll(time)
+        scrolled = self.sin_line.scroll(time) or scrolled
+        if not self.blit or scrolled or self.background is None:
+            with PROFILER.stage("canvas.draw"):
+                self.fig.canvas.draw()
+
+        if self.blit:
+            self.fig.canvas.restore_region(self.background)
+            self.cos_line.draw()
+            self.sin_line.draw()
+            self.fig.canvas.blit(self.fig.bbox)
+        with PROFILER.stage("flush_events"):
+            self.fig.canvas.flush_events()
+
+    def set_info(self, cos_info: str, sin_info: str) -> None:
+        # Подписи в углу графиков, например оценка частоты по спектру.
+        self.cos_line.set_info(cos_info)
+        self.sin_line.set_info(sin_info)
+
+    def reset(self, times, cos_data, sin_data) -> None:
+        # Заменяет историю целиком, например после перемотки записи.
+        self.cos_line.set_history(times, cos_data)
+        self.sin_line.set_history(times, sin_data)
+        self.redraw()
+
+    def zoom(self, factor: float) -> None:
+        # factor > 1 - показать больший отрезок истории, вплоть до всей; < 1 - приблизить.
+        now = self.cos_line.history.last_time
+        self.time_limit = min(max(self.time_limit * factor, MIN_TIME_LIMIT), max(2 * now, NoGraph.time_limit))
+        self.cos_line.zoom(self.time_limit, now)
+        self.sin_line.zoom(self.time_limit, now)
+        self.redraw()
+
+    def redraw(self) -> None:
         self.fig.canvas.draw()
+        if self.blit:
+            self.fig.canvas.restore_region(self.background)
+            self.cos_line.draw()
+            self.sin_line.draw()
+            self.fig.canvas.blit(self.fig.bbox)
         self.fig.canvas.flush_events()
 
     def close(self):
-        plt.close()
+        import matplotlib.pyplot as plt
+
+        plt.close(self.fig)
+
+
+class NoGraph:
+    # Тот же интерфейс, что у GraphDrawer, но без окна matplotlib: для рисовальщиков, которым графики не нужны
+    # (например, при экспорте кадров в video_export.py).
+    time_limit = 15
+
+    def components(self) -> list:
+        return []
+
+    def update(self, time, new_cos_data, new_sin_data) -> None:
+        pass
+
+    def set_info(self, cos_info: str, sin_info: str) -> None:
+        pass
+
+    def reset(self, times, cos_data, sin_data) -> None:
+        pass
+
+    def zoom(self, factor: float) -> None:
+        pass
+
+    def close(self):
+        pass
 
 
 class Line:
-    def __init__(self, ax, time_limit: float, y_limit: float, color: str, ylabel: str, xlabel: str="Время") -> None:
+    def __init__(self, ax, time_limit: float, y_limit: float, color: str, ylabel: str, xlabel: str="Время", capacity: int = 4096, animated: bool = False) -> None:
         self.ax = ax
         self.time_limit = time_limit
         self.y_limit = y_limit
+        self.x_min = 0
 
-        self.ax.set_xlim(0, self.time_limit)
+        self.ax.set_xlim(self.x_min, self.x_min + self.time_limit)
         self.ax.set_ylim(-self.y_limit, self.y_limit)
 
         self.ax.set_ylabel(ylabel)
         self.ax.set_xlabel(xlabel)
 
-        self.data_x = []
-        self.data_y = []
+        # Вся история в уровнях разной подробности: на график попадает не больше пары точек на пиксель,
+        # сколько бы отсчетов ни набралось.
+        self.history = HistoryPyramid(capacity)
 
-        self.line, = self.ax.plot(self.data_x, self.data_y, color=color)
+        self.line, = self.ax.plot([], [], color=color, animated=animated)
+        self.info = self.ax.text(0.01, 0.97, "", transform=self.ax.transAxes, va="top", fontsize="small", animated=animated)
+        # Растеризация текста в matplotlib дорогая, поэтому готовые пиксели подписи кэшируются
+        # и в следующих кадрах просто копируются на место.
+        self.info_pixels = None
 
     def add_data(self, new_x, new_y) -> None:
-        self.data_x.append(new_x)
-        self.data_y.append(new_y)
-        self.line.set_xdata(self.data_x)
-        self.line.set_ydata(self.data_y)
+        self.history.append(new_x, new_y)
+        self.refresh()
+
+    def set_history(self, times, values) -> None:
+        self.history.clear()
+        self.history.extend(times, values)
+        if len(times):
+            self.x_min = max(times[-1] - self.time_limit / 2, 0)
+            self.ax.set_xlim(self.x_min, self.x_min + self.time_limit)
+        self.refresh()
+
+    def zoom(self, time_limit: float, now: float) -> None:
+        self.time_limit = time_limit
+        self.x_min = max(now - self.time_limit / 2, 0)
+        self.ax.set_xlim(self.x_min, self.x_min + self.time_limit)
+        self.refresh()
+
+    def refresh(self) -> None:
+        # Точки для видимого окна с того уровня истории, который соответствует ширине осей в пикселях.
+        width = max(int(self.ax.bbox.width), 1)
+        self.line.set_data(*self.history.view(self.x_min, self.x_min + self.time_limit, width))
+
+    def set_info(self, text: str) -> None:
+        if text != self.info.get_text():
+            self.info.set_text(text)
+            self.info_pixels = None
+
+    def scroll(self, time) -> bool:
+        # Окно сдвигается сразу на половину ширины, чтобы оси перерисовывались редко.
+        if time <= self.x_min + self.time_limit:
+            return False
+        self.x_min = time - self.time_limit / 2
+        self.ax.set_xlim(self.x_min, self.x_min + self.time_limit)
+        self.refresh()
+        return True
+
+    def draw(self) -> None:
+        # Вызывается после restore_region(background), поэтому под подписью всегда чистый фон.
+        canvas = self.ax.figure.canvas
+        if self.info_pixels is None:
+            self.ax.draw_artist(self.info)
+            self.info_pixels = canvas.copy_from_bbox(self.info.get_window_extent().expanded(1.1, 1.2))
+        else:
+            canvas.restore_region(self.info_pixels)
+        self.ax.draw_artist(self.line)
@@ -0,0 +1,204 @@
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from electronic_oscillator_model import ElectronicOscillator
+from pendulum_ensemble import NonlinearPendulum
+from pendulum_model import Pendulum
+from phase_density import DensityHistogram, poincare_mask, wrap_angle
+from point import Point
+from ring_buffer import RingBuffer
+from spectrum import dominant_tone, windowed_spectrum
+from table_export import export, model_chunks
+
+# Запуск моделей без окна: ни pygame, ни matplotlib здесь не импортируются.
+# Сценарий - словарь (или JSON-файл) вида
+# {"model": "pendulum", "parameters": {"period": 2, "amplitude": 30}, "duration": 60, "sample_rate": 100}
+# Вместо duration и sample_rate можно указать "periods" и "interval" (шаг в долях периода).
+
+PENDULUM_COLUMNS = ("time", "deviation", "speed")
+ELECTRONIC_COLUMNS = ("time", "charge", "amperage")
+
+
+def make_pendulum(parameters: dict) -> Pendulum:
+    return Pendulum(
+        Point(0, 0),
+        parameters.get("length_of_rope", 300),
+        parameters["period"],
+        parameters["amplitude"]
+    )
+
+
+def make_nonlinear_pendulum(parameters: dict) -> NonlinearPendulum:
+    return NonlinearPendulum(
+        Point(0, 0),
+        parameters.get("length_of_rope", 300),
+        parameters["period"],
+        parameters["amplitude"],
+        parameters.get("damping", 0.),
+        parameters.get("drive_force", 0.),
+        parameters.get("drive_frequency", 0.),
+        parameters.get("method", "rk4")
+    )
+
+
+def make_electronic_oscillator(parameters: dict) -> ElectronicOscillator:
+    return ElectronicOscillator(
+        parameters.get("maximal_charge", 30),
+        parameters["period"],
+        parameters.get("resistance", 0.),
+        parameters.get("inductance", 1.),
+        parameters.get("source_voltage", 0.),
+        parameters.get("source_frequency", 0.)
+    )
+
+
+MODELS = {
+    "pendulum": (make_pendulum, PENDULUM_COLUMNS),
+    "nonlinear_pendulum": (make_nonlinear_pendulum, PENDULUM_COLUMNS),
+    "electronic": (make_electronic_oscillator, ELECTRONIC_COLUMNS),
+}
+
+
+def build_model(scenario: dict) -> tuple:
+    factory, columns = MODELS[scenario["model"]]
+    return factory(scenario.get("parameters", {})), columns
+
+
+def sample_rate(scenario: dict) -> float:
+    # Шаг можно задать долей периода ("interval"), как в get_data_for_table.
+    if "interval" in scenario:
+        return 1 / (scenario["interval"] * scenario["parameters"]["period"])
+    return scenario["sample_rate"]
+
+
+def duration(scenario: dict) -> float:
+    if "periods" in scenario:
+        return scenario["periods"] * scenario["parameters"]["period"]
+    return scenario["duration"]
+
+
+def analyzed_chunks(chunks, tails):
+    # Пропускает куски дальше без изменений, попутно запоминая последние отсчеты столбцов после времени.
+    for chunk in chunks:
+        for tail, values in zip(tails, chunk[:, 1:].T):
+            tail.extend(values)
+        yield chunk
+
+
+def portrait_chunks(chunks, histogram, poincare_frequency: float = 0., turn: float = None):
+    # Копит фазовый портрет по двум величинам; с poincare_frequency - только сечение Пуанкаре.
+    # turn - полный оборот в единицах первой величины, если ее нужно брать по модулю.
+    previous_time = -1.
+    for chunk in chunks:
+        times, first, second = chunk[:, 0], chunk[:, 1], chunk[:, 2]
+        if poincare_frequency:
+            section = poincare_mask(times, poincare_frequency, previous_time)
+            first, second = first[section], second[section]
+        if turn is not None:
+            first = wrap_angle(first, turn)
+        if len(times):
+            previous_time = times[-1]
+        histogram.add(first, second)
+        yield chunk
+
+
+def write_spectrum(path: str, columns, tails, sample_rate: float) -> None:
+    # Спектр нужен один раз в конце, поэтому считается одним FFT по последним отсчетам, без скользящего ДПФ.
+    summary = {}
+    for column, tail in zip(columns, tails):
+        samples = tail.view()
+        frequency, amplitude, phase = dominant_tone(windowed_spectrum(samples), len(samples), sample_rate)
+        summary[column] = {"frequency": frequency, "amplitude": amplitude, "phase": phase}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def run_scenario(scenario: dict, output: str, chunk_size: int = 65536, fmt: str = None, spectrum_window: int = None,
+                 portrait: str = None, portrait_size: int = 512, poincare: bool = False) -> int:
+    # Формат выбирается по расширению output (.csv, .npy, .parquet, .txt).
+    # С spectrum_window рядом пишется output + ".spectrum.json": частота, амплитуда и фаза
+    # основной гармоники каждой величины по последним spectrum_window отсчетам.
+    # portrait - путь .npz для плотности фазового портрета (counts, x_limit, y_limit),
+    # poincare=True оставляет в нем только точки раз в период вынуждающей силы.
+    # Возвращает число записанных строк.
+    model, columns = build_model(scenario)
+    poincare_frequency = 0.
+    if poincare:
+        # Без вынуждающей силы сечения нет; молча рисовать вместо него всю траекторию нельзя.
+        poincare_frequency = getattr(model, "drive_frequency", 0.)
+        if not poincare_frequency or not getattr(model, "drive_force", 0.):
+            raise ValueError(f"сечение Пуанкаре нужно строить для маятника с вынуждающей силой, а у модели {scenario['model']!r} ее нет")
+    chunks = model_chunks(model, duration(scenario), sample_rate(scenario), chunk_size)
+    tails = []
+    if spectrum_window:
+        tails = [RingBuffer(spectrum_window) for _ in columns[1:]]
+        chunks = analyzed_chunks(chunks, tails)
+    histogram = None
+    if portrait is not None:
+        histogram = DensityHistogram(size=(portrait_size, portrait_size))
+        turn = 2 * math.pi * model.accuracy if poincare_frequency else None
+        chunks = portrait_chunks(chunks, histogram, poincare_frequency, turn)
+    rows = export(chunks, output, list(columns), fmt)
+    if tails:
+        write_spectrum(output + ".spectrum.json", columns[1:], tails, sample_rate(scenario))
+    if histogram is not None:
+        np.savez(portrait, counts=histogram.counts, x_limit=histogram.x_limit, y_limit=histogram.y_limit)
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Расчёт колебаний без графического окна")
+    parser.add_argument("scenario", nargs="?", help="JSON-файл сценария")
+    parser.add_argument("-o", "--output", required=True, help="куда записать результат: .csv, .npy, .parquet или .txt")
+    parser.add_argument("--model", choices=sorted(MODELS))
+    parser.add_argument("--period", type=float)
+    parser.add_argument("--amplitude", type=float, help="максимальное отклонение маятника, градусы")
+    parser.add_argument("--maximal-charge", type=float)
+    parser.add_argument("--resistance", type=float)
+    parser.add_argument("--duration", type=float)
+    parser.add_argument("--sample-rate", type=float)
+    parser.add_argument("--interval", type=float, help="шаг по времени в долях периода")
+    parser.add_argument("--periods", type=float, help="длительность в периодах")
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--spectrum", type=int, nargs="?", const=4096, metavar="WINDOW",
+                        help="записать основную гармонику по последним WINDOW отсчетам (по умолчанию 4096)")
+    parser.add_argument("--portrait", help="записать плотность фазового портрета в .npz")
+    parser.add_argument("--portrait-size", type=int, default=512)
+    parser.add_argument("--poincare", action="store_true", help="в портрет - только сечение Пуанкаре (раз в период силы)")
+    return parser.parse_args(argv)
+
+
+def scenario_from_args(args) -> dict:
+    scenario = {"parameters": {}}
+    if args.scenario is not None:
+        with open(args.scenario, encoding="utf-8") as f:
+            scenario.update(json.load(f))
+    # Параметры командной строки перекрывают значения из файла.
+    for key in ("model", "duration", "sample_rate", "interval", "periods"):
+        if getattr(args, key) is not None:
+            scenario[key] = getattr(args, key)
+    for key in ("period", "amplitude", "maximal_charge", "resistance"):
+        if getattr(args, key) is not None:
+            scenario["parameters"][key] = getattr(args, key)
+    return scenario
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    scenario = scenario_from_args(args)
+    try:
+        rows = run_scenario(scenario, args.output, args.chunk_size, spectrum_window=args.spectrum,
+                            portrait=args.portrait, portrait_size=args.portrait_size, poincare=args.poincare)
+    except ValueError as error:
+        sys.exit(f"headless.py: {error}")
+    print(f"{rows} строк записано в {args.output}", file=sys.stderr)
+    if args.spectrum:
+        print(f"Спектр записан в {args.output}.spectrum.json", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+# История значений для графика на любом масштабе: от одного периода до всего многочасового прогона.
+# Уровень 0 - последние capacity отсчетов как есть. На уровне k каждая запись - минимум и максимум
+# (с моментами, когда они были) по factor записям уровня k - 1, то есть по factor^k отсчетам.
+# Уровни достраиваются по мере поступления отсчетов, их число растет как log(N), а каждый хранит
+# не больше capacity записей, поэтому память ограничена, а самый грубый уровень покрывает всю историю.
+
+
+class Level:
+    def __init__(self, capacity: int) -> None:
+        self.time_min = RingBuffer(capacity)
+        self.minimum = RingBuffer(capacity)
+        self.time_max = RingBuffer(capacity)
+        self.maximum = RingBuffer(capacity)
+        # Пока уровень не переполнялся, в нем вся история с начала.
+        self.overflowed = False
+        # Незаконченная запись: сколько записей нижнего уровня в нее вошло и [t_min, min, t_max, max].
+        self.count = 0
+        self.pending = None
+
+    def __len__(self) -> int:
+        return len(self.time_min)
+
+    def push(self, time_min: float, minimum: float, time_max: float, maximum: float) -> None:
+        self.overflowed = self.overflowed or len(self) == self.time_min.capacity
+        self.time_min.append(time_min)
+        self.minimum.append(minimum)
+        self.time_max.append(time_max)
+        self.maximum.append(maximum)
+
+    def extend(self, time_min, minimum, time_max, maximum) -> None:
+        self.overflowed = self.overflowed or len(self) + len(time_min) > self.time_min.capacity
+        self.time_min.extend(time_min)
+        self.minimum.extend(minimum)
+        self.time_max.extend(time_max)
+        self.maximum.extend(maximum)
+
+    def points(self, first: int, last: int, tail: list = ()) -> tuple:
+        # Записи [first, last) и, если отрезок доходит до конца, еще не сложившиеся записи tail:
+        # по две точки на запись в том порядке, в каком минимум и максимум были во времени.
+        time_min = self.time_min.view()[first:last]
+        minimum = self.minimum.view()[first:last]
+        time_max = self.time_max.view()[first:last]
+        maximum = self.maximum.view()[first:last]
+        if last >= len(self) and tail:
+            time_min, minimum, time_max, maximum = (
+                np.append(values, pending) for values, pending in zip((time_min, minimum, time_max, maximum), zip(*tail))
+            )
+        ordered = time_min <= time_max
+        xs = np.empty(2 * len(time_min))
+        ys = np.empty(2 * len(time_min))
+        xs[0::2] = np.where(ordered, time_min, time_max)
+        xs[1::2] = np.where(ordered, time_max, time_min)
+        ys[0::2] = np.where(ordered, minimum, maximum)
+        ys[1::2] = np.where(ordered, maximum, minimum)
+        return xs, ys
+
+
+class HistoryPyramid:
+    def __init__(self, capacity: int = 4096, factor: int = 4) -> None:
+        self.capacity = capacity
+        self.factor = factor
+        self.times = RingBuffer(capacity)
+        self.values = RingBuffer(capacity)
+        self.overflowed = False
+        self.levels = []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def last_time(self) -> float:
+        return float(self.times.last()) if len(self.times) else 0.
+
+    def clear(self) -> None:
+        self.times.clear()
+        self.values.clear()
+        self.overflowed = False
+        self.levels = []
+
+    def append(self, time: float, value: float) -> None:
+        self.overflowed = self.overflowed or len(self.times) == self.capacity
+        self.times.append(time)
+        self.values.append(value)
+        self.add(0, time, value, time, value)
+
+    def extend(self, times, values) -> None:
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        self.overflowed = self.overflowed or len(self.times) + len(times) > self.capacity
+        self.times.extend(times)
+        self.values.extend(values)
+        self.add_many(0, times, values, times, values)
+
+    def level(self, index: int) -> Level:
+        if index == len(self.levels):
+            self.levels.append(Level(self.capacity))
+        return self.levels[index]
+
+    def add(self, index: int, time_min: float, minimum: float, time_max: float, maximum: float) -> None:
+        # Одна запись нижнего уровня в незаконченную запись уровня index.
+        level = self.level(index)
+        if not level.count:
+            level.pending = [time_min, minimum, time_max, maximum]
+        else:
+            pending = level.pending
+            if minimum < pending[1]:
+                pending[0], pending[1] = time_min, minimum
+            if maximum > pending[3]:
+                pending[2], pending[3] = time_max, maximum
+        level.count += 1
+        if level.count == self.factor:
+            level.count = 0
+            level.push(*level.pending)
+            self.add(index + 1, *level.pending)
+
+    def add_many(self, index: int, time_min, minimum, time_max, maximum) -> None:
+        # То же для массива записей: незаконченная запись дописывается по одной, остальное - группами по factor.
+        if not len(time_min):
+            return
+        level = self.level(index)
+        head = min((self.factor - level.count) % self.factor, len(time_min))
+        for i in range(head):
+            self.add(index, time_min[i], minimum[i], time_max[i], maximum[i])
+        groups = (len(time_min) - head) // self.factor
+        end = head + groups * self.factor
+        if groups:
+            shape = (groups, self.factor)
+            rows = np.arange(groups)
+            lows = minimum[head:end].reshape(shape)
+            highs = maximum[head:end].reshape(shape)
+            low_index = lows.argmin(axis=1)
+            high_index = highs.argmax(axis=1)
+            entries = (
+                time_min[head:end].reshape(shape)[rows, low_index],
+                lows[rows, low_index],
+                time_max[head:end].reshape(shape)[rows, high_index],
+                highs[rows, high_index],
+            )
+            level.extend(*entries)
+            self.add_many(index + 1, *entries)
+        for i in range(end, len(time_min)):
+            self.add(index, time_min[i], minimum[i], time_max[i], maximum[i])
+
+    def view(self, start: float, end: float, width: int) -> tuple:
+        # Точки линии на отрезке [start, end] шириной width пикселей - не больше примерно 2·width.
+        # Берется самый подробный уровень, который еще хранит начало отрезка и укладывается в ширину.
+        times = self.times.view()
+        if not self.overflowed or (len(times) and times[0] <= start):
+            first, last = self.bounds(times, start, end)
+            if last - first <= 2 * width or not self.levels:
+                return times[first:last], self.values.view()[first:last]
+        for index, level in enumerate(self.levels):
+            time_min = level.time_min.view()
+            if level.overflowed and time_min[0] > start:
+                continue
+            first, last = self.bounds(time_min, start, end)
+            if last - first <= width or level is self.levels[-1]:
+                return level.points(first, last, self.tail(index))
+        return times[:0], self.values.view()[:0]
+
+    def tail(self, index: int) -> list:
+        # Все, что еще не сложилось в записи уровня index: незаконченные записи его и уровней ниже
+        # и сами последние отсчеты, не вошедшие ни в одну запись. Без этого правый край графика отставал бы.
+        tail = [level.pending for level in self.levels[index:0:-1] if level.count]
+        count = self.levels[0].count
+        if count:
+            times, values = self.times.view()[-count:], self.values.view()[-count:]
+            tail.extend([time, value, time, value] for time, value in zip(times, values))
+        return tail
+
+    @staticmethod
+    def bounds(times, start: float, end: float) -> tuple:
+        # Индексы с запасом в одну точку слева и справа, чтобы линия доходила до краев графика.
+        first, last = np.searchsorted(times, (start, end))
+        return max(first - 1, 0), min(last + 1, len(times))
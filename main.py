@@ -1,15 +1,45 @@
 import time
 
+STARTED = time.perf_counter() # начало запуска для python main.py --startup
+
+import argparse
+import importlib
+import os
+import sys
+import threading
+
 import pygame
-from tabulate import tabulate
 
-from electronic_oscillator import ElectronicOscillatorDrawer
-from pendulum import PendulumDrawer
+from assets import ASSETS
+from frame_profiler import PROFILER
 from point import Point
-
-pygame.init()
-FONT = pygame.font.Font(None, 30)
+from scene import Scene, slot_x
+
+# Чтобы меню появлялось сразу, модули симуляций (numpy, matplotlib, tabulate) здесь не импортируются:
+# они подгружаются в фоновом потоке, пока открыто меню, а если понадобились раньше - там, где используются.
+WARM_UP_MODULES = (
+    "numpy",
+    "pendulum",
+    "pendulum_ensemble",
+    "period_sweep",
+    "electronic_oscillator",
+    "coupled_chain",
+    "replay",
+    "table_export",
+    "tabulate",
+    "matplotlib.pyplot",
+)
+
+# pygame, шрифт и окно создаются в Application, чтобы импорт модуля ничего не открывал.
+FONT = None
+screen = None
+GRAPHS = "matplotlib" # чем рисовать графики, см. graph_drawer.BACKENDS и --graphs
 COLOR_INACTIVE = (255, 255, 255)
+FPS = 20
+IDLE_TIMEOUT = 500 # мс: сколько меню и пауза ждут события, прежде чем проверить состояние снова
+WIDTH = 800
+HEIGHT = 400
+BLACK = (0, 0, 0)
 
 class InputBox:
     def __init__(self, x, y, w, h, color, text=''):
@@ -69,10 +99,47 @@ class Button:
         pygame.draw.rect(screen, self.color, self.rect, 2)
 
 
-class MainMenu:
+class ToggleButton(Button):
+    def __init__(self, x, y, w, h, color, text) -> None:
+        super().__init__(x, y, w, h, color, text)
+        self.label = text
+        self.render_text()
+
+    def handle_event(self, event):
+        # В отличие от Button, состояние меняется только по клику на саму кнопку.
+        if event.type == pygame.MOUSEBUTTONDOWN and self.rect.collidepoint(event.pos):
+            self.active = not self.active
+            self.render_text()
+
+    def render_text(self):
+        mark = "[x] " if self.active else "[ ] "
+        self.txt_surface = FONT.render(mark + self.label, True, self.color)
+
+
+class SceneBuilder:
+    # Осцилляторы, выбранные в меню до нажатия "Продолжить". Каждый задан функцией factory(x, number),
+    # которая создаёт рисовальщик в полосе окна с центром x; number - номер осциллятора, начиная с 1.
     def __init__(self) -> None:
+        self.factories = []
+
+    def add(self, factory) -> None:
+        self.factories.append(factory)
+
+    def build(self) -> list:
+        count = len(self.factories)
+        return [factory(slot_x(i, count, WIDTH), i + 1) for i, factory in enumerate(self.factories)]
+
+
+def table_path(number: int) -> str:
+    return "Табличка.txt" if number == 1 else f"Табличка {number}.txt"
+
+
+class MainMenu:
+    def __init__(self, builder: SceneBuilder = None) -> None:
         self.electronic_button = Button(250, 150, 300, 50, COLOR_INACTIVE, "Электромгнитные колебания")
         self.pendulum_button = Button(250, 200, 300, 50, COLOR_INACTIVE, "Механчиеские колебания")
+        self.chain_button = Button(250, 250, 300, 50, COLOR_INACTIVE, "Связанные маятники")
+        self.builder = builder if builder is not None else SceneBuilder()
         self.next_stage = None
 
     def update(self, screen, events):
@@ -80,70 +147,97 @@ class MainMenu:
             self.handle_event(event)
         self.electronic_button.update(screen)
         self.pendulum_button.update(screen)
+        self.chain_button.update(screen)
         self.make_logic()
 
     def handle_event(self, event):
         self.electronic_button.handle_event(event)
         self.pendulum_button.handle_event(event)
+        self.chain_button.handle_event(event)
 
     def make_logic(self):
         if self.electronic_button.active:
-            self.next_stage = ElectronicMenu()
+            self.next_stage = ElectronicMenu(self.builder)
             return
         if self.pendulum_button.active:
-            self.next_stage = PendulumMenu()
+            self.next_stage = PendulumMenu(self.builder)
+            return
+        if self.chain_button.active:
+            self.next_stage = ChainMenu(self.builder)
             return
     
-    def get_user_sprite(self):
-        return None
+    def get_user_sprites(self):
+        return []
 
     def get_next_stage(self):
         return self.next_stage
 
 
 class ElectronicMenu:
-    def __init__(self) -> None:
+    def __init__(self, builder: SceneBuilder) -> None:
+        self.electronic_resistance_button = InputBox(250, 100, 300, 50, COLOR_INACTIVE, text="Сопротивление, Ом")
         self.electronic_period_button = InputBox(250, 150, 300, 50, COLOR_INACTIVE, text="Период, с")
         self.electronic_next_button = Button(250, 200, 300, 50, COLOR_INACTIVE, "Продолжить")
-        self.sprite = None
+        self.electronic_add_button = Button(250, 250, 300, 50, COLOR_INACTIVE, "Добавить ещё")
+        self.builder = builder
+        self.sprites = []
         self.next_stage = None
 
     def update(self, screen, events):
         for event in events:
             self.handle_event(event)
+        self.electronic_resistance_button.update(screen)
         self.electronic_period_button.update(screen)
         self.electronic_next_button.update(screen)
+        self.electronic_add_button.update(screen)
         self.make_logic()
 
     def handle_event(self, event):
+        self.electronic_resistance_button.handle_event(event)
         self.electronic_period_button.handle_event(event)
         self.electronic_next_button.handle_event(event)
+        self.electronic_add_button.handle_event(event)
 
     def make_logic(self):
-        if self.electronic_next_button.active:
+        if self.electronic_next_button.active or self.electronic_add_button.active:
+            resistance_text = self.electronic_resistance_button.current_text
             try:
                 period = float(self.electronic_period_button.current_text)
+                # Сопротивление можно не вводить, тогда контур идеальный.
+                resistance = 0. if resistance_text == self.electronic_resistance_button.text else float(resistance_text)
             except ValueError:
                 self.electronic_period_button.reset_text()
+                self.electronic_resistance_button.reset_text()
                 print(self.electronic_period_button.current_text)
             else:
-                self.init_sprite(period)
+                self.builder.add(lambda x, number: self.init_sprite(x, number, period, resistance))
+                if self.electronic_add_button.active:
+                    self.next_stage = MainMenu(self.builder)
+                else:
+                    self.sprites = self.builder.build()
+                    self.next_stage = NoMenu()
                 self.electronic_next_button.active = False
-                self.next_stage = NoMenu()
+                self.electronic_add_button.active = False
+
+    def init_sprite(self, x, number, period, resistance=0.):
+        from electronic_oscillator import ElectronicOscillator, ElectronicOscillatorDrawer
 
-    def init_sprite(self, period):
-        self.sprite = ElectronicOscillatorDrawer(
-            Point(400, 200), # центр спрайта колебательного контура
-            30, # Максимальный заряд
+        maximal_charge = 30 # Максимальный заряд
+        sprite = ElectronicOscillatorDrawer(
+            Point(x, 200), # центр спрайта колебательного контура
+            maximal_charge,
             period,
             "electronic_oscillator.png",
-            screen
+            screen,
+            oscillator=ElectronicOscillator(maximal_charge, period, resistance),
+            graphs=GRAPHS
         )
-        self.make_table()
+        self.make_table(sprite, table_path(number))
+        return sprite
 
-    def make_table(self):
-        table = Table(["Время", "Заряд", "Напряжение"])
-        data = self.sprite.get_data_for_table(0.25)
+    def make_table(self, sprite, path):
+        table = Table(["Время", "Заряд", "Напряжение"], path)
+        data = sprite.get_data_for_table(0.25)
         for i in data:
             new_data = [
                 str(round(i["time"], 2)) + " с.",
@@ -153,19 +247,24 @@ class ElectronicMenu:
             table.add(new_data)
         table.show()
     
-    def get_user_sprite(self):
-        return self.sprite
+    def get_user_sprites(self):
+        return self.sprites
     
     def get_next_stage(self):
         return self.next_stage
 
 
 class PendulumMenu:
-    def __init__(self) -> None:
+    def __init__(self, builder: SceneBuilder) -> None:
         self.pendulum_period_button = InputBox(250, 100, 300, 50, COLOR_INACTIVE, text="Период")
         self.pendulum_max_deviation_button = InputBox(250, 150, 300, 50, COLOR_INACTIVE, text="Макс. отклонение")
         self.pendulum_next_button = Button(250, 200, 300, 50, COLOR_INACTIVE, "Продолжить")
-        self.sprite = None
+        self.pendulum_nonlinear_button = ToggleButton(250, 250, 300, 50, COLOR_INACTIVE, "Нелинейная модель")
+        self.pendulum_add_button = Button(250, 300, 300, 50, COLOR_INACTIVE, "Добавить ещё")
+        self.exact_period_key = None
+        self.exact_period_surface = None
+        self.builder = builder
+        self.sprites = []
         self.next_stage = None
 
     def update(self, screen, events):
@@ -174,15 +273,36 @@ class PendulumMenu:
         self.pendulum_period_button.update(screen)
         self.pendulum_max_deviation_button.update(screen)
         self.pendulum_next_button.update(screen)
+        self.pendulum_nonlinear_button.update(screen)
+        self.pendulum_add_button.update(screen)
+        self.draw_exact_period(screen)
         self.make_logic()
 
+    def draw_exact_period(self, screen):
+        # Период с учетом амплитуды: введенный период считается периодом малых колебаний.
+        key = (self.pendulum_period_button.current_text, self.pendulum_max_deviation_button.current_text)
+        if key != self.exact_period_key:
+            self.exact_period_key = key
+            self.exact_period_surface = None
+            from period_sweep import exact_period
+            try:
+                period = exact_period(float(key[0]), float(key[1]))
+            except ValueError:
+                pass
+            else:
+                self.exact_period_surface = FONT.render(f"Точный период: {period:.3f} с", True, COLOR_INACTIVE)
+        if self.exact_period_surface is not None:
+            screen.blit(self.exact_period_surface, (255, 360))
+
     def handle_event(self, event):
         self.pendulum_period_button.handle_event(event)
         self.pendulum_max_deviation_button.handle_event(event)
         self.pendulum_next_button.handle_event(event)
+        self.pendulum_nonlinear_button.handle_event(event)
+        self.pendulum_add_button.handle_event(event)
 
     def make_logic(self):
-        if self.pendulum_next_button.active:
+        if self.pendulum_next_button.active or self.pendulum_add_button.active:
             try:
                 period = float(self.pendulum_period_button.current_text)
                 max_devaition = float(self.pendulum_max_deviation_button.current_text)
@@ -190,25 +310,43 @@ class PendulumMenu:
                 self.pendulum_period_button.reset_text()
                 self.pendulum_max_deviation_button.reset_text()
             else:
-                self.init_sprite(period, max_devaition)
+                nonlinear = self.pendulum_nonlinear_button.active
+                self.builder.add(lambda x, number: self.init_sprite(x, number, period, max_devaition, nonlinear))
+                if self.pendulum_add_button.active:
+                    self.next_stage = MainMenu(self.builder)
+                else:
+                    self.sprites = self.builder.build()
+                    self.next_stage = NoMenu()
                 self.pendulum_next_button.active = False
-                self.next_stage = NoMenu()
-
-    def init_sprite(self, period, max_deviation):
-        self.sprite = PendulumDrawer(
-            Point(400, 0), # Точка опоры
-            300, # Длинна веревки
+                self.pendulum_add_button.active = False
+
+    def init_sprite(self, x, number, period, max_deviation, nonlinear=False):
+        from pendulum import PendulumDrawer
+        from pendulum_ensemble import NonlinearPendulum
+
+        fulcrum = Point(x, 0) # Точка опоры
+        length_of_rope = 300 # Длинна веревки
+        pendulum = None
+        if nonlinear:
+            # Полное уравнение с sinθ вместо приближения малых колебаний.
+            pendulum = NonlinearPendulum(fulcrum, length_of_rope, period, max_deviation)
+        sprite = PendulumDrawer(
+            fulcrum,
+            length_of_rope,
             period,
             max_deviation,
             'pendulum.png',
-            screen
+            screen,
+            pendulum,
+            GRAPHS
         )
 
-        self.make_table()
+        self.make_table(sprite, table_path(number))
+        return sprite
 
-    def make_table(self):
-        table = Table(["Время", "Отклонение", "Скорость"])
-        data = self.sprite.get_data_for_table(0.25)
+    def make_table(self, sprite, path):
+        table = Table(["Время", "Отклонение", "Скорость"], path)
+        data = sprite.get_data_for_table(0.25)
         for i in data:
             new_data = [
                 str(round(i["time"], 2)) + " с.",
@@ -219,8 +357,72 @@ class PendulumMenu:
         table.show()
 
 
-    def get_user_sprite(self):
-        return self.sprite
+    def get_user_sprites(self):
+        return self.sprites
+
+    def get_next_stage(self):
+        return self.next_stage
+
+
+class ChainMenu:
+    def __init__(self, builder: SceneBuilder) -> None:
+        self.chain_count_button = InputBox(250, 100, 300, 50, COLOR_INACTIVE, text="Число маятников")
+        self.chain_period_button = InputBox(250, 150, 300, 50, COLOR_INACTIVE, text="Период, с")
+        self.chain_coupling_button = InputBox(250, 200, 300, 50, COLOR_INACTIVE, text="Жёсткость связи, 1/с²")
+        self.chain_next_button = Button(250, 250, 300, 50, COLOR_INACTIVE, "Продолжить")
+        self.chain_add_button = Button(250, 300, 300, 50, COLOR_INACTIVE, "Добавить ещё")
+        self.builder = builder
+        self.sprites = []
+        self.next_stage = None
+
+    def update(self, screen, events):
+        for event in events:
+            self.handle_event(event)
+        self.chain_count_button.update(screen)
+        self.chain_period_button.update(screen)
+        self.chain_coupling_button.update(screen)
+        self.chain_next_button.update(screen)
+        self.chain_add_button.update(screen)
+        self.make_logic()
+
+    def handle_event(self, event):
+        self.chain_count_button.handle_event(event)
+        self.chain_period_button.handle_event(event)
+        self.chain_coupling_button.handle_event(event)
+        self.chain_next_button.handle_event(event)
+        self.chain_add_button.handle_event(event)
+
+    def make_logic(self):
+        if self.chain_next_button.active or self.chain_add_button.active:
+            try:
+                count = int(self.chain_count_button.current_text)
+                period = float(self.chain_period_button.current_text)
+                coupling = float(self.chain_coupling_button.current_text)
+                if count < 1:
+                    raise ValueError
+            except ValueError:
+                self.chain_count_button.reset_text()
+                self.chain_period_button.reset_text()
+                self.chain_coupling_button.reset_text()
+            else:
+                self.builder.add(lambda x, number: self.init_sprite(x, number, count, period, coupling))
+                if self.chain_add_button.active:
+                    self.next_stage = MainMenu(self.builder)
+                else:
+                    self.sprites = self.builder.build()
+                    self.next_stage = NoMenu()
+                self.chain_next_button.active = False
+                self.chain_add_button.active = False
+
+    def init_sprite(self, x, number, count, period, coupling):
+        from coupled_chain import CoupledChainDrawer
+
+        amplitude = 30 # Начальное отклонение первого маятника
+        width = 300 # Длина цепочки на экране
+        return CoupledChainDrawer(Point(x, 200), width, count, period, coupling, amplitude, screen, graphs=GRAPHS)
+
+    def get_user_sprites(self):
+        return self.sprites
 
     def get_next_stage(self):
         return self.next_stage
@@ -230,8 +432,8 @@ class NoMenu:
     def update(self, screen, events):
         pass
 
-    def get_user_sprite(self):
-        return None
+    def get_user_sprites(self):
+        return []
 
     def get_next_stage(self):
         return None
@@ -241,72 +443,245 @@ class NoMenu:
 
 
 class Table:
-    def __init__(self, name_list: list[str]) -> None:
+    def __init__(self, name_list: list[str], path: str = "Табличка.txt") -> None:
         self.name_list = name_list
+        self.path = path
         self.value_list = []   
 
     def add(self, new_value: list[str]) -> None:
         self.value_list.append(new_value)
 
     def show(self):
-        print("табличка")
-        table = tabulate(self.value_list, self.name_list, tablefmt="fancy_grid")
-        with open("Табличка.txt", "w", encoding="utf-8") as f:
-            f.write(table)
-
+        from table_export import TextTableWriter
 
+        print("табличка")
+        with TextTableWriter(self.path, self.name_list) as writer:
+            writer.write(self.value_list)
+
+
+
+class Application:
+    def __init__(self, profile: bool = False, trace_path: str = None, record_path: str = None, replay_paths: list = None,
+                 graphs: str = "matplotlib") -> None:
+        global FONT, screen, GRAPHS
+        # Только нужные подсистемы: pygame.init() открыл бы еще звук и джойстики, которые не используются.
+        pygame.display.init()
+        pygame.font.init()
+        FONT = pygame.font.Font(None, 30)
+        GRAPHS = graphs
+        panel = None
+        if graphs == "pygame":
+            # Графики рисуются в полосе под осцилляторами, а не в отдельном окне.
+            from panel_graph import PANEL_HEIGHT
+
+            panel = pygame.Rect(0, HEIGHT, WIDTH, PANEL_HEIGHT)
+        window = pygame.display.set_mode((WIDTH, HEIGHT + (panel.height if panel else 0)))
+        # Рисовальщики получают только область осцилляторов: от ее нижнего края отсчитываются фазовые портреты.
+        screen = window.subsurface((0, 0, WIDTH, HEIGHT)) if panel else window
+        ASSETS.preload()
+
+        self.screen = window
+        self.fps = FPS
+        self.scene = Scene(window, panel)
+        self.running = True
+        self.paused = False
+        self.clock = pygame.time.Clock()
+        # Меню рисуется в отдельную поверхность и перерисовывается только по событиям.
+        self.menu_surface = pygame.Surface(window.get_size())
+        self.menu_dirty = True
+
+        # F3 включает замеры и показывает HUD; trace_path - куда сохранить trace при выходе.
+        # С profile или trace_path замеры идут все время, и F3 переключает только HUD.
+        PROFILER.enabled = profile or trace_path is not None
+        self.profile = profile
+        self.trace_path = trace_path
+
+        self.app = MainMenu()
+        # record_path - куда писать прогон, replay_paths - записи, которые воспроизводятся вместо меню.
+        self.record_path = record_path
+        self.record_runs = 0 # Сколько прогонов уже записано: каждый следующий (после ESC) пишется в свой файл.
+        # Время от запуска до первого кадра меню и до конца фонового импорта, в секундах.
+        self.menu_time = None
+        self.ready_time = None
+        self.warm_up_thread = None
+        if replay_paths:
+            from replay import open_replay
+
+            for path in replay_paths:
+                self.scene.add(open_replay(path, screen, graphs))
+            self.fps = self.scene.fps
+            self.app = NoMenu()
+
+    def run(self) -> None:
+        self.frame()
+        self.start_warm_up()
+        while self.running:
+            self.frame()
+        if self.trace_path is not None:
+            PROFILER.export_chrome_trace(self.trace_path)
+        pygame.quit()
+
+    def start_warm_up(self) -> None:
+        # Вызывается после первого кадра, чтобы фоновый импорт не задерживал появление меню.
+        self.menu_time = time.perf_counter() - STARTED
+        self.warm_up_thread = threading.Thread(target=self.warm_up, daemon=True)
+        self.warm_up_thread.start()
+
+    def warm_up(self) -> None:
+        for name in WARM_UP_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # Необязательная библиотека не установлена - ошибка будет там, где она понадобится.
+                pass
+        self.ready_time = time.perf_counter() - STARTED
+
+    def measure_startup(self) -> tuple:
+        # Первый кадр меню и фоновый импорт, как в run(), но без главного цикла.
+        self.frame()
+        self.start_warm_up()
+        self.warm_up_thread.join()
+        pygame.quit()
+        return self.menu_time, self.ready_time
+
+    def frame(self) -> None:
+        idle = self.is_idle()
+        if idle:
+            # Меню и пауза ничего не считают, поэтому процесс спит до события.
+            with PROFILER.stage("events.wait"):
+                waited_events = self.wait_events()
+        with PROFILER.stage("clock.tick"):
+            elapsed = self.clock.tick(0 if idle else self.fps) / 1000
+        PROFILER.begin_frame()
+        with PROFILER.stage("events"):
+            pygame_events = waited_events if idle else pygame.event.get()
+        sprites = self.app.get_user_sprites()
+        next_menu_stage = self.app.get_next_stage()
+        menu_changed = bool(pygame_events) or self.menu_dirty
+        if menu_changed:
+            self.menu_dirty = False
+            self.menu_surface.fill(BLACK)
+            with PROFILER.stage("app.update"):
+                self.app.update(self.menu_surface, pygame_events)
+
+        if next_menu_stage is not None:
+            self.app = next_menu_stage
+            self.menu_dirty = True
+
+        for sprite in sprites:
+            self.scene.add(sprite)
+        if sprites:
+            self.fps = self.scene.fps
+            if self.record_path is not None:
+                self.record_runs += 1
+                self.scene.start_recording(run_path(self.record_path, self.record_runs))
+
+        for event in pygame_events:
+            self.handle_event(event)
 
-def abort_all_sprites(sprites_group):
-    sprites = sprites_group.sprites()
-    for i in sprites:
-        i.abort()
-
-FPS = 20
-WIDTH = 800
-HEIGHT = 400
-BLACK = (0, 0, 0)
-pygame.mixer.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-all_sprites = pygame.sprite.Group()
-running = True
-paused = False
-clock = pygame.time.Clock()
-
-app = MainMenu()
-
-while running:
-    pygame_events = pygame.event.get()
-    screen.fill(BLACK)
-    clock.tick(FPS)
-    sprite = app.get_user_sprite()
-    next_menu_stage = app.get_next_stage()
-    app.update(screen, pygame_events)
-
-    app = next_menu_stage if next_menu_stage is not None else app
-    
-    if sprite is not None:
-        if isinstance(sprite, ElectronicOscillatorDrawer):
-            FPS = 15
-        if isinstance(sprite, PendulumDrawer):
-            FPS = 20
-        all_sprites.add(sprite)
-
-    for event in pygame_events:
+        if self.paused:
+            PROFILER.end_frame()
+            return
+        if self.scene:
+            with PROFILER.stage("scene.update"):
+                advanced = self.scene.update(elapsed)
+            if not advanced and not PROFILER.hud:
+                # Ни один осциллятор не сделал шага - на экране ничего не изменилось.
+                PROFILER.end_frame()
+                return
+            with PROFILER.stage("scene.draw"):
+                rects = self.scene.draw()
+            if PROFILER.hud:
+                hud_rect = PROFILER.draw_hud(self.screen)
+                rects.append(hud_rect)
+                # В следующем кадре место под HUD перерисуется из фона вместе со спрайтами.
+                self.scene.group.repaint_rect(hud_rect)
+            with PROFILER.stage("display.update"):
+                pygame.display.update(rects)
+        elif menu_changed or PROFILER.hud:
+            self.screen.blit(self.menu_surface, (0, 0))
+            if PROFILER.hud:
+                PROFILER.draw_hud(self.screen)
+            with PROFILER.stage("display.flip"):
+                pygame.display.flip()
+        PROFILER.end_frame()
+
+    def is_idle(self) -> bool:
+        # Кадр можно не считать, пока нет ни сцены в движении, ни отложенного перехода между меню.
+        if self.scene and not self.paused:
+            return False
+        if self.menu_dirty or self.app.get_user_sprites() or self.app.get_next_stage() is not None:
+            return False
+        return True
+
+    def wait_events(self) -> list:
+        event = pygame.event.wait(IDLE_TIMEOUT)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def handle_event(self, event) -> None:
         if event.type == pygame.QUIT:
-            running = False
+            self.running = False
+        if event.type == pygame.MOUSEWHEEL and event.y:
+            self.scene.zoom_graphs(0.5 if event.y > 0 else 2)
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
-                paused = not paused
+                self.paused = not self.paused
+                self.scene.reset_clocks()
+            if event.key == pygame.K_UP:
+                self.scene.scale_time(2)
+            if event.key == pygame.K_DOWN:
+                self.scene.scale_time(0.5)
+            if event.key == pygame.K_r:
+                self.scene.scale_time(-1)
+            if event.key == pygame.K_p:
+                self.scene.toggle_portraits()
+            if event.key == pygame.K_LEFT:
+                self.scene.seek(-10)
+            if event.key == pygame.K_RIGHT:
+                self.scene.seek(10)
+            if event.key == pygame.K_MINUS:
+                self.scene.zoom_graphs(2)
+            if event.key == pygame.K_EQUALS:
+                self.scene.zoom_graphs(0.5)
+            if event.key == pygame.K_F3:
+                PROFILER.hud = not PROFILER.hud
+                PROFILER.enabled = PROFILER.hud or self.profile or self.trace_path is not None
             if event.key == pygame.K_ESCAPE:
-                app = MainMenu()
-                abort_all_sprites(all_sprites)
-                all_sprites.empty()
-                paused = False
-
-    if paused:
-        continue
-    all_sprites.update()
-    all_sprites.draw(screen)
-    pygame.display.flip()
-
-pygame.quit()
+                self.app = MainMenu()
+                self.menu_dirty = True
+                self.scene.abort()
+                self.paused = False
+
+
+def run_path(path: str, run: int) -> str:
+    # Файл записи run-го прогона: run.rec, затем run-2.rec, run-3.rec ..., чтобы новый прогон не затирал старый.
+    if run == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}-{run}{extension}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Симуляция колебательных движений")
+    parser.add_argument("--profile", action="store_true", help="замерять стадии кадра (HUD по F3)")
+    parser.add_argument("--trace", help="сохранить Chrome trace (JSON) при выходе")
+    parser.add_argument("--record", help="записать прогон в бинарный файл (следующие прогоны - в файл-2, файл-3 ...)")
+    parser.add_argument("--replay", nargs="+", help="воспроизвести записи вместо меню")
+    parser.add_argument(
+        "--graphs", choices=("matplotlib", "pygame", "none"), default="matplotlib",
+        help="графики в отдельном окне matplotlib, в окне симуляции или без графиков"
+    )
+    parser.add_argument("--startup", action="store_true", help="замерить время запуска и выйти")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    application = Application(args.profile, args.trace, args.record, args.replay, args.graphs)
+    if args.startup:
+        menu_time, ready_time = application.measure_startup()
+        print(f"Меню: {menu_time * 1000:.0f} мс, все модули: {ready_time * 1000:.0f} мс", file=sys.stderr)
+    else:
+        application.run()
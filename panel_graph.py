@@ -0,0 +1,157 @@
+import math
+
+import numpy as np
+import pygame
+
+from graph_drawer import MIN_TIME_LIMIT, NoGraph
+from history_pyramid import HistoryPyramid
+
+# Графики прямо в окне симуляции (main.py --graphs pygame) вместо отдельного окна matplotlib.
+# Интерфейс тот же, что у graph_drawer.GraphDrawer. Оси, сетка и подписи рисуются один раз в кэш
+# и заново только при прокрутке, масштабе или смене размера; в кадре - копия кэша и по одному
+# pygame.draw.lines на линию. Место под панель задает Scene (place).
+
+PANEL_HEIGHT = 200 # высота полосы под панели графиков в окне
+BLACK = (0, 0, 0)
+FRAME = (110, 110, 110)
+GRID = (45, 45, 45)
+TEXT = (200, 200, 200)
+RED = (230, 60, 60)
+BLUE = (80, 130, 255)
+MARGIN_LEFT = 6
+MARGIN_BOTTOM = 16
+FONT_SIZE = 18
+
+
+class Trace:
+    def __init__(self, y_limit: float, color: tuple, label: str, capacity: int) -> None:
+        self.y_limit = y_limit
+        self.color = color
+        self.label = label
+        self.history = HistoryPyramid(capacity)
+        self.info = ""
+        self.info_surface = None
+        # Область осей внутри панели; задается в PanelGraph.place.
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+    def set_info(self, text: str) -> None:
+        if text != self.info:
+            self.info = text
+            self.info_surface = None
+
+    def points(self, x_min: float, time_limit: float) -> list:
+        # Точки линии в пикселях панели: не больше пары на пиксель ширины, как в graph_drawer.Line.
+        xs, ys = self.history.view(x_min, x_min + time_limit, max(self.rect.width, 1))
+        points = np.empty((len(xs), 2))
+        points[:, 0] = self.rect.left + (xs - x_min) * (self.rect.width / time_limit)
+        points[:, 1] = self.rect.centery - np.clip(ys, -self.y_limit, self.y_limit) * (self.rect.height / 2 / self.y_limit)
+        return points.tolist()
+
+
+class PanelGraph(pygame.sprite.DirtySprite):
+    def __init__(self, y_cos_limit: float, y_sin_limit: float, cos_label: str, sin_label: str, capacity: int = 4096) -> None:
+        pygame.sprite.DirtySprite.__init__(self)
+        self.layer = 0
+        self.time_limit = 15
+        self.x_min = 0
+        self.cos_trace = Trace(y_cos_limit, RED, cos_label, capacity)
+        self.sin_trace = Trace(y_sin_limit, BLUE, sin_label, capacity)
+        self.font = pygame.font.Font(None, FONT_SIZE)
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.image = pygame.Surface((0, 0))
+        self.axes = None
+
+    def components(self) -> list:
+        return [self]
+
+    def place(self, rect: pygame.Rect) -> None:
+        # Две оси друг под другом, подписи времени под нижней.
+        self.rect = pygame.Rect(rect)
+        self.image = pygame.Surface(self.rect.size).convert()
+        height = (self.rect.height - MARGIN_BOTTOM) // 2
+        width = self.rect.width - 2 * MARGIN_LEFT
+        self.cos_trace.rect = pygame.Rect(MARGIN_LEFT, 2, width, height - 4)
+        self.sin_trace.rect = pygame.Rect(MARGIN_LEFT, height + 2, width, height - 4)
+        self.axes = None
+        self.render()
+
+    def update(self, time, new_cos_data, new_sin_data) -> None:
+        self.cos_trace.history.append(time, new_cos_data)
+        self.sin_trace.history.append(time, new_sin_data)
+        if time > self.x_min + self.time_limit:
+            # Как в graph_drawer.Line: окно сдвигается на половину ширины, чтобы оси перерисовывались редко.
+            self.x_min = time - self.time_limit / 2
+            self.axes = None
+        self.render()
+
+    def set_info(self, cos_info: str, sin_info: str) -> None:
+        self.cos_trace.set_info(cos_info)
+        self.sin_trace.set_info(sin_info)
+
+    def reset(self, times, cos_data, sin_data) -> None:
+        self.cos_trace.history.clear()
+        self.sin_trace.history.clear()
+        self.cos_trace.history.extend(times, cos_data)
+        self.sin_trace.history.extend(times, sin_data)
+        if len(times):
+            self.x_min = max(times[-1] - self.time_limit / 2, 0)
+        self.axes = None
+        self.render()
+
+    def zoom(self, factor: float) -> None:
+        now = self.cos_trace.history.last_time
+        self.time_limit = min(max(self.time_limit * factor, MIN_TIME_LIMIT), max(2 * now, NoGraph.time_limit))
+        self.x_min = max(now - self.time_limit / 2, 0)
+        self.axes = None
+        self.render()
+
+    def close(self) -> None:
+        self.kill()
+
+    def render(self) -> None:
+        if not self.rect.width:
+            return
+        if self.axes is None:
+            self.axes = self.draw_axes()
+        self.image.blit(self.axes, (0, 0))
+        for trace in (self.cos_trace, self.sin_trace):
+            points = trace.points(self.x_min, self.time_limit)
+            if len(points) > 1:
+                pygame.draw.lines(self.image, trace.color, False, points)
+            if trace.info:
+                if trace.info_surface is None:
+                    # Во встроенном шрифте pygame нет знака ≈ из подписей спектра.
+                    trace.info_surface = self.font.render(trace.info.replace("≈", "~"), True, TEXT)
+                self.image.blit(trace.info_surface, trace.info_surface.get_rect(topright=(trace.rect.right - 3, trace.rect.top + 2)))
+        self.dirty = 1
+
+    def draw_axes(self) -> pygame.Surface:
+        axes = pygame.Surface(self.rect.size).convert()
+        axes.fill(BLACK)
+        step = tick_step(self.time_limit)
+        ticks = np.arange(math.ceil(self.x_min / step), math.floor((self.x_min + self.time_limit) / step) + 1) * step
+        for trace in (self.cos_trace, self.sin_trace):
+            scale = trace.rect.width / self.time_limit
+            for tick in ticks:
+                x = round(trace.rect.left + (tick - self.x_min) * scale)
+                pygame.draw.line(axes, GRID, (x, trace.rect.top), (x, trace.rect.bottom))
+            pygame.draw.line(axes, GRID, (trace.rect.left, trace.rect.centery), (trace.rect.right, trace.rect.centery))
+            pygame.draw.rect(axes, FRAME, trace.rect, 1)
+            label = self.font.render(f"{trace.label} (±{trace.y_limit:.4g})", True, TEXT)
+            axes.blit(label, (trace.rect.left + 3, trace.rect.top + 2))
+        bottom = self.sin_trace.rect
+        scale = bottom.width / self.time_limit
+        for tick in ticks:
+            text = self.font.render(f"{tick:g}", True, TEXT)
+            x = bottom.left + (tick - self.x_min) * scale
+            axes.blit(text, text.get_rect(midtop=(x, bottom.bottom + 2)).clamp(axes.get_rect()))
+        return axes
+
+
+def tick_step(span: float, count: int = 6) -> float:
+    # Круглый шаг сетки (1, 2 или 5 на степень десяти), чтобы на отрезке span было не больше count делений.
+    power = 10 ** math.floor(math.log10(span / count))
+    for multiplier in (1, 2, 5, 10):
+        if span / (multiplier * power) <= count:
+            return multiplier * power
+    return 10 * power
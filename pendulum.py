@@ -1,142 +1,210 @@
 import math
-import os
 import time
 
+import numpy as np
 import pygame
 from pygame import gfxdraw
 
-from graph_drawer import GraphDrawer
+from assets import ASSETS
+from frame_profiler import PROFILER
+from graph_drawer import open_graph
+from pendulum_model import Pendulum
+from phase_density import poincare_mask, wrap_angle
+from phase_portrait import PhasePortrait
 from point import Point
+from recording import RecordingWriter
+from sim_clock import SimulationClock, seek_ticks
+from spectrum import ModelSpectrum
 
 PI = math.pi
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 
 
-class PendulumDrawer(pygame.sprite.Sprite):
-    def __init__(self, fulcrum: Point, length_of_rope: int, peroid: float, amplitude: float, sprite: str, screen) -> None:
-        self.pendulum = Pendulum(fulcrum, length_of_rope, peroid, amplitude)
+class PendulumDrawer(pygame.sprite.DirtySprite):
+    fps = 20
+
+    def __init__(self, fulcrum: Point, length_of_rope: int, peroid: float, amplitude: float, sprite: str, screen, pendulum: "Pendulum" = None,
+                 graphs: bool | str = True) -> None:
+        # pendulum позволяет подставить другую модель с тем же интерфейсом, например NonlinearPendulum.
+        # graphs - чем рисовать графики (graph_drawer.BACKENDS), False - без графиков.
+        self.pendulum = pendulum if pendulum is not None else Pendulum(fulcrum, length_of_rope, peroid, amplitude)
+        self.fulcrum = fulcrum
         self.init_pg_sprite(sprite)
 
-        self.graph_drawer = GraphDrawer(self.pendulum.maximal_deviation+10, self.pendulum.maximal_speed+10, "Смещение", "Скорость")
+        self.graph_drawer = open_graph(graphs, self.pendulum.maximal_deviation+10, self.pendulum.maximal_speed+10, "Смещение", "Скорость")
         # Прибавляем по 10 к каждому значению, чтобы графики не "упирались" в границы.
         self.screen = screen
-        self.fulcrum = fulcrum
+        self.rope = Rope(fulcrum, self.pendulum.current_position)
+        self.clock = SimulationClock(self.pendulum.time_step)
+        self.recorder: RecordingWriter = None
+        self.recorded_ticks = self.pendulum.ticks
+        self.spectrum = ModelSpectrum(self.pendulum)
+        self.processed_ticks = self.pendulum.ticks
+        # Фазовый портрет (клавиша P). Для маятника с вынуждающей силой - сечение Пуанкаре.
+        self.poincare_frequency = getattr(self.pendulum, "drive_frequency", 0.)
+        if self.poincare_frequency:
+            limits = PI * self.pendulum.accuracy, self.pendulum.maximal_speed * 3
+        else:
+            limits = self.pendulum.maximal_deviation * 1.25, self.pendulum.maximal_speed * 1.25
+        self.portrait = PhasePortrait(*limits, (fulcrum.x, screen.get_height() - 5))
+
+    @property
+    def model(self) -> Pendulum:
+        return self.pendulum
+
+    def describe(self) -> dict:
+        # Все, что нужно, чтобы по записи заново построить такой же рисовальщик.
+        return {
+            "kind": "pendulum",
+            "fulcrum": [self.fulcrum.x, self.fulcrum.y],
+            "length_of_rope": self.pendulum.length_of_rope,
+            "period": self.pendulum.period,
+            "amplitude": self.pendulum.amplitude,
+            "time_step": self.pendulum.time_step,
+            "sprite": self.sprite_name,
+            "columns": ["deviation", "speed"],
+        }
+
+    def components(self) -> list:
+        # Спрайты для LayeredDirty: веревка под грузом.
+        return [self.rope, self, self.portrait, *self.graph_drawer.components()]
 
     def init_pg_sprite(self, sprite):
-        pygame.sprite.Sprite.__init__(self)
-        self.game_folder = os.path.dirname(__file__)
-        self.img_folder = os.path.join(self.game_folder, "sprites")
-        self.image = pygame.image.load(os.path.join(self.img_folder, sprite)).convert()
-        self.image.set_colorkey(BLACK)
+        pygame.sprite.DirtySprite.__init__(self)
+        self.layer = 1
+        self.sprite_name = sprite
+        # Груз наклоняется вместе с веревкой; повернутые копии берутся из общего кэша.
+        ASSETS.prepare_rotations(sprite, self.pendulum.amplitude)
+        self.image = ASSETS.rotated_image(sprite, self.tilt_angle())
 
         self.rect = self.image.get_rect()
         self.rect.center = (self.pendulum.current_position.x, self.pendulum.current_position.y)
 
-    def update(self) -> None:
-        self.update_pendulum()
+    def update(self, elapsed: float = None) -> None:
+        # elapsed - реальное время кадра в секундах. Без него маятник делает один шаг за кадр.
+        steps = 1 if elapsed is None else self.clock.advance(elapsed)
+        steps = max(steps, -self.pendulum.ticks) # назад не дальше начала
+        if steps:
+            with PROFILER.stage("Pendulum.move"):
+                self.update_pendulum(steps)
         self.draw_rope()
-        self.draw_graph()
+        if steps > 0:
+            self.process_ticks()
+            self.draw_graph()
+            self.portrait.update()
+        elif steps < 0:
+            self.draw_graph_history()
 
     def draw_rope(self):
-        gfxdraw.line(
-            self.screen,
-            self.fulcrum.x,
-            self.fulcrum.y,
-            self.pendulum.current_position.x,
-            self.pendulum.current_position.y,
-            WHITE
-        )
-
-    def update_pendulum(self) -> None:
-        self.pendulum.move()
-        self.rect.center = (self.pendulum.current_position.x, self.pendulum.current_position.y)
+        self.rope.set_end(self.pendulum.current_position)
+
+    def update_pendulum(self, steps: int = 1) -> None:
+        self.pendulum.move(steps)
+        center = (self.pendulum.current_position.x, self.pendulum.current_position.y)
+        image = ASSETS.rotated_image(self.sprite_name, self.tilt_angle())
+        if center != self.rect.center or image is not self.image:
+            self.image = image
+            self.rect = image.get_rect(center=center)
+            self.dirty = 1
+
+    def tilt_angle(self) -> float:
+        # Угол веревки от вертикали в градусах, положительный - против часовой стрелки на экране.
+        position = self.pendulum.current_position
+        return math.degrees(math.atan2(position.x - self.fulcrum.x, position.y - self.fulcrum.y))
 
     def draw_graph(self) -> None:
-        self.graph_drawer.update(self.pendulum.timer,
-        self.pendulum.math_position_in_trajectory, 
-        self.pendulum.speed)
+        labels = self.spectrum.labels()
+        if labels is not None:
+            self.graph_drawer.set_info(*labels)
+        with PROFILER.stage("GraphDrawer.update"):
+            self.graph_drawer.update(self.pendulum.timer,
+            self.pendulum.math_position_in_trajectory, 
+            self.pendulum.speed)
+
+    def draw_graph_history(self) -> None:
+        # После перемотки или при обратном воспроизведении история графика строится заново.
+        start = max(self.pendulum.ticks - round(self.graph_drawer.time_limit / 2 / self.pendulum.time_step), 0)
+        times = np.arange(start, self.pendulum.ticks + 1) * self.pendulum.time_step
+        deviation, speed = self.pendulum.evaluate(times)
+        self.spectrum.restart()
+        self.processed_ticks = self.pendulum.ticks
+        labels = self.spectrum.labels()
+        if labels is not None:
+            self.graph_drawer.set_info(*labels)
+        self.graph_drawer.reset(times, deviation, speed)
+
+    def seek(self, time: float) -> None:
+        self.update_pendulum(seek_ticks(self.pendulum, time) - self.pendulum.ticks)
+        self.draw_rope()
+        self.draw_graph_history()
+
+    def start_recording(self, path: str) -> None:
+        self.recorder = RecordingWriter(path, self.describe())
+        self.recorded_ticks = self.pendulum.ticks
+
+    def process_ticks(self) -> None:
+        # Все тики с прошлого кадра, даже если их прошло несколько: одним вызовом evaluate
+        # для спектра и для записи (NonlinearPendulum при повторном запросе считал бы заново).
+        ticks = np.arange(self.processed_ticks + 1, self.pendulum.ticks + 1)
+        if not len(ticks):
+            return
+        times = ticks * self.pendulum.time_step
+        deviation, speed = self.pendulum.evaluate(times)
+        with PROFILER.stage("spectrum.update"):
+            self.spectrum.extend(deviation, speed)
+        if self.poincare_frequency:
+            section = poincare_mask(times, self.poincare_frequency, (ticks[0] - 1) * self.pendulum.time_step)
+            self.portrait.add(wrap_angle(deviation[section], 2 * PI * self.pendulum.accuracy), speed[section])
+        else:
+            self.portrait.add(deviation, speed)
+        if self.recorder is not None:
+            self.record(ticks, times, deviation, speed)
+        self.processed_ticks = self.pendulum.ticks
+
+    def record(self, ticks, times, deviation, speed) -> None:
+        # Уже записанные тики (после перемотки назад) пропускаем, чтобы время в записи только росло.
+        new = ticks > self.recorded_ticks
+        xs, ys = self.pendulum.positions(deviation[new])
+        self.recorder.append(ticks[new], times[new], deviation[new], speed[new], xs, ys)
+        self.recorded_ticks = max(self.recorded_ticks, self.pendulum.ticks)
 
     def abort(self):
         self.graph_drawer.close()
+        if self.recorder is not None:
+            self.recorder.close()
 
     def get_data_for_table(self, interval: float) -> list:
-        previos_time = self.pendulum.timer
-        i = 0
-        ans = []
-        while i <= self.pendulum.period:
-            self.pendulum.timer = i
-            data = {
-                "time": i,
-                "deviation": self.pendulum.math_position_in_trajectory,
-                "speed": self.pendulum.speed
-            }
-            ans.append(data)
-            i += interval * self.pendulum.period
-        self.pendulum.timer = previos_time
-        return ans
-
-
-
-class Pendulum:
-    def __init__(self, fulcrum: Point, length_of_rope: int, peroid: float, amplitude: float) -> None:
-        self.fulcrum = fulcrum
-        self.length_of_rope = length_of_rope
-        self.amplitude = amplitude
-
-        self.period = peroid
-
-        self.trajectory: list[Point] = []
-        self.generate_trajectory()
-        self.current_position_in_trajectory: float = 0
-
-        self.current_position: Point = self.trajectory[self.current_position_in_trajectory]
-
-        self.timer: float = 0.
-
-    def move(self) -> None:
-        try: # TODO придумать что-нибудь более изобретательное
-            self.current_position = self.trajectory[int(round(self.current_position_in_trajectory))]
-        except IndexError:
-            self.current_position = self.trajectory[int(round(self.current_position_in_trajectory)) - 1]
-        
-        self.current_position_in_trajectory = self.math_position_in_trajectory + self.maximal_deviation
-        self.add_time()
-
-    def add_time(self) -> None:
-        self.timer += 0.05 # Т.к. обнвление кадра происходит 20 раз в сек. добаляем 1 / 20
-
-    @property
-    def math_position_in_trajectory(self) -> float:
-        return self.maximal_deviation * math.cos(self.cyclic_frequency * self.timer)
-
-    @property
-    def speed(self) -> float:
-        return -self.maximal_speed * math.sin(self.cyclic_frequency * self.timer)
-
-    @property
-    def maximal_speed(self) -> float:
-        return self.maximal_deviation * self.cyclic_frequency
-
-    @property
-    def maximal_deviation(self) -> float:
-        return len(self.trajectory) / 2
-
-    @property
-    def cyclic_frequency(self) -> float:
-        return PI * 2 / self.period
-
-    def generate_trajectory(self, accuracy=250) -> None:
-        start_trajectory, end_trajectory = self.converted_amplitude()
-
-        for i in range(int(start_trajectory * accuracy), int(end_trajectory * accuracy), 1):
-            corner = i / accuracy
-
-            X = round(self.length_of_rope * math.cos(corner) + self.fulcrum.x)
-            Y = round(self.length_of_rope * math.sin(corner) + self.fulcrum.y)
-
-            self.trajectory.append(Point(X, Y))
+        steps = math.floor(1 / interval + 1e-9)
+        times = np.arange(steps + 1) * interval * self.pendulum.period
+        deviation, speed = self.pendulum.evaluate(times)
+        return [
+            {"time": t, "deviation": d, "speed": v}
+            for t, d, v in zip(times.tolist(), deviation.tolist(), speed.tolist())
+        ]
+
+
+class Rope(pygame.sprite.DirtySprite):
+    def __init__(self, start: Point, end: Point) -> None:
+        super().__init__()
+        self.layer = 0
+        self.start = start
+        self.end = None
+        self.set_end(end)
+
+    def set_end(self, end: Point) -> None:
+        if self.end is not None and (end.x, end.y) == (self.end.x, self.end.y):
+            return
+        self.end = end
+        # Поверхность размером с прямоугольник, описанный вокруг веревки, перерисовывается только он.
+        left, top = min(self.start.x, end.x), min(self.start.y, end.y)
+        width, height = abs(end.x - self.start.x) + 1, abs(end.y - self.start.y) + 1
+        self.image = pygame.Surface((width, height))
+        self.image.set_colorkey(BLACK)
+        gfxdraw.line(self.image, self.start.x - left, self.start.y - top, end.x - left, end.y - top, WHITE)
+        self.rect = pygame.Rect(left, top, width, height)
+        self.dirty = 1
 
-    def converted_amplitude(self) -> tuple:
-        in_radians = self.amplitude * PI / 180
-        return PI/2 - in_radians, PI/2 + in_radians
+    def update(self, *args) -> None:
+        # Веревку двигает PendulumDrawer.
+        pass
@@ -0,0 +1,251 @@
+import math
+
+import numpy as np
+
+from pendulum_model import Pendulum
+from point import Point
+
+PI = math.pi
+
+# Таблица Бутчера метода Дормана-Принса 5(4).
+DP_NODES = (0, 1/5, 3/10, 4/5, 8/9, 1, 1)
+DP_COEFFICIENTS = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84),
+)
+DP_WEIGHTS_5 = (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0)
+DP_WEIGHTS_4 = (5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40)
+CHECKPOINT_TICKS = 1024 # Через сколько шагов сохраняется копия ансамбля для перемотки назад.
+
+
+class PendulumEnsemble:
+    # N независимых маятников: θ'' = -ω0²·sinθ - γ·θ' + F·cos(Ωt).
+    # Все параметры - числа или массивы длины N, состояние хранится в массивах numpy.
+    def __init__(self, angle, angular_speed, natural_frequency, damping=0., drive_force=0., drive_frequency=0.) -> None:
+        self.angle, self.angular_speed = (
+            np.array(i, dtype=float) for i in np.broadcast_arrays(np.atleast_1d(angle), angular_speed)
+        )
+        self.stiffness = np.asarray(natural_frequency, dtype=float) ** 2
+        self.damping = np.asarray(damping, dtype=float)
+        self.drive_force = np.asarray(drive_force, dtype=float)
+        self.drive_frequency = np.asarray(drive_frequency, dtype=float)
+
+        self.time: float = 0.
+        self.adaptive_step: float = None # Последний удачный шаг адаптивного метода.
+
+        self.methods = {
+            "rk4": self.step_rk4,
+            "verlet": self.step_verlet,
+            "adaptive": self.step_adaptive,
+        }
+
+    def __len__(self) -> int:
+        return len(self.angle)
+
+    def copy(self) -> "PendulumEnsemble":
+        return PendulumEnsemble(
+            self.angle, self.angular_speed, np.sqrt(self.stiffness),
+            self.damping, self.drive_force, self.drive_frequency
+        )
+
+    def acceleration(self, angle, angular_speed, time):
+        return (
+            -self.stiffness * np.sin(angle)
+            - self.damping * angular_speed
+            + self.drive_force * np.cos(self.drive_frequency * time)
+        )
+
+    def step(self, dt: float, method: str = "rk4") -> None:
+        self.methods[method](dt)
+
+    def step_rk4(self, dt: float) -> None:
+        t, x, v = self.time, self.angle, self.angular_speed
+
+        k1_x, k1_v = v, self.acceleration(x, v, t)
+        k2_x = v + k1_v * dt / 2
+        k2_v = self.acceleration(x + k1_x * dt / 2, k2_x, t + dt / 2)
+        k3_x = v + k2_v * dt / 2
+        k3_v = self.acceleration(x + k2_x * dt / 2, k3_x, t + dt / 2)
+        k4_x = v + k3_v * dt
+        k4_v = self.acceleration(x + k3_x * dt, k4_x, t + dt)
+
+        self.angle = x + (k1_x + 2 * k2_x + 2 * k3_x + k4_x) * dt / 6
+        self.angular_speed = v + (k1_v + 2 * k2_v + 2 * k3_v + k4_v) * dt / 6
+        self.time = t + dt
+
+    def step_verlet(self, dt: float) -> None:
+        # Скоростной Верле. Без затухания метод симплектический и не "раскачивает" энергию.
+        half_speed = self.angular_speed + self.acceleration(self.angle, self.angular_speed, self.time) * dt / 2
+        self.angle = self.angle + half_speed * dt
+        self.time += dt
+        self.angular_speed = half_speed + self.acceleration(self.angle, half_speed, self.time) * dt / 2
+
+    def step_adaptive(self, dt: float, tolerance: float = 1e-6) -> None:
+        # Проходим отрезок dt внутренними шагами Дормана-Принса, шаг общий для всего ансамбля.
+        end = self.time + dt
+        h = min(self.adaptive_step or dt, dt)
+        while self.time < end:
+            h = min(h, end - self.time)
+            angle, angular_speed, error = self.dormand_prince(h)
+            scale = tolerance * (1 + np.maximum(np.abs(angle), np.abs(self.angle)))
+            error_norm = float(np.max(error / scale)) if len(self) else 0.
+            if error_norm <= 1:
+                self.angle, self.angular_speed = angle, angular_speed
+                self.time += h
+                self.adaptive_step = h
+            factor = 5. if error_norm == 0 else min(5., max(0.2, 0.9 * error_norm ** -0.2))
+            h *= factor
+
+    def dormand_prince(self, h: float) -> tuple:
+        k_x, k_v = [], []
+        for node, coefficients in zip(DP_NODES, DP_COEFFICIENTS):
+            x = self.angle + h * sum(c * k for c, k in zip(coefficients, k_x))
+            v = self.angular_speed + h * sum(c * k for c, k in zip(coefficients, k_v))
+            k_x.append(v)
+            k_v.append(self.acceleration(x, v, self.time + node * h))
+
+        angle = self.angle + h * sum(w * k for w, k in zip(DP_WEIGHTS_5, k_x))
+        angular_speed = self.angular_speed + h * sum(w * k for w, k in zip(DP_WEIGHTS_5, k_v))
+        error_x = h * sum((w5 - w4) * k for w5, w4, k in zip(DP_WEIGHTS_5, DP_WEIGHTS_4, k_x))
+        error_v = h * sum((w5 - w4) * k for w5, w4, k in zip(DP_WEIGHTS_5, DP_WEIGHTS_4, k_v))
+        return angle, angular_speed, np.maximum(np.abs(error_x), np.abs(error_v))
+
+    def sample(self, times, dt: float, method: str = "rk4") -> tuple:
+        # Интегрирует ансамбль вперёд и возвращает углы и скорости формы (len(times), N)
+        # в моменты times (по возрастанию, не раньше self.time).
+        times = np.asarray(times, dtype=float)
+        angles = np.empty((len(times), len(self)))
+        speeds = np.empty((len(times), len(self)))
+        for i, moment in enumerate(times):
+            while moment - self.time > 1e-12:
+                self.step(min(dt, moment - self.time), method)
+            angles[i] = self.angle
+            speeds[i] = self.angular_speed
+        return angles, speeds
+
+    def solve(self, times, dt: float, method: str = "rk4") -> tuple:
+        # То же, что sample, но на копии: сам ансамбль не меняется.
+        ensemble = self.copy()
+        ensemble.time = self.time
+        return ensemble.sample(times, dt, method)
+
+    def snapshot(self) -> "PendulumEnsemble":
+        # Копия вместе с моментом времени и шагом адаптивного метода: с нее можно продолжить интегрирование.
+        ensemble = self.copy()
+        ensemble.time = self.time
+        ensemble.adaptive_step = self.adaptive_step
+        return ensemble
+
+
+class Checkpoints:
+    # Копии ансамбля на тиках 0, stride, 2·stride, ...: перемотка назад начинается с ближайшей копии
+    # не позже цели, а не с нулевого момента, поэтому стоит не больше stride шагов.
+    def __init__(self, ensemble: PendulumEnsemble, stride: int = CHECKPOINT_TICKS) -> None:
+        self.stride = stride
+        self.ensembles = [ensemble.snapshot()]
+
+    def next_tick(self) -> int:
+        return len(self.ensembles) * self.stride
+
+    def save(self, ensemble: PendulumEnsemble) -> None:
+        self.ensembles.append(ensemble.snapshot())
+
+    def restore(self, tick: int) -> tuple:
+        # Тик ближайшей копии не позже tick и сама копия, которую можно менять.
+        index = min(max(tick, 0) // self.stride, len(self.ensembles) - 1)
+        return index * self.stride, self.ensembles[index].snapshot()
+
+
+class NonlinearPendulum(Pendulum):
+    # Маятник, который движется по решению полного уравнения из PendulumEnsemble.
+    # Отображается один элемент ансамбля с индексом member.
+    def __init__(self, fulcrum: Point, length_of_rope: int, peroid: float, amplitude: float,
+                 damping: float = 0., drive_force: float = 0., drive_frequency: float = 0.,
+                 method: str = "rk4", ensemble: PendulumEnsemble = None, member: int = 0) -> None:
+        super().__init__(fulcrum, length_of_rope, peroid, amplitude)
+        if ensemble is None:
+            ensemble = PendulumEnsemble(
+                amplitude * PI / 180, 0., self.cyclic_frequency,
+                damping, drive_force, drive_frequency
+            )
+        self.ensemble = ensemble
+        # Отдельные копии для хода маятника и для evaluate: evaluate идет по своей сетке моментов times.
+        self.checkpoints = Checkpoints(ensemble.copy())
+        self.evaluation_checkpoints = Checkpoints(ensemble.copy())
+        self.evaluation_ensemble: PendulumEnsemble = None
+        self.member = member
+        self.method = method
+        self.current_position = self.position_at_angle(self.angle)
+
+    def move(self, steps: int = 1) -> None:
+        self.add_time(steps)
+        self.current_position_in_trajectory = self.math_position_in_trajectory + self.maximal_deviation
+        self.current_position = self.position_at_angle(self.angle)
+
+    def add_time(self, steps: int = 1) -> None:
+        if steps < 0:
+            # Назад уравнение не интегрируем, а считаем заново от ближайшей сохраненной копии.
+            target = max(self.ticks + steps, 0)
+            self.ticks, self.ensemble = self.checkpoints.restore(target)
+            steps = target - self.ticks
+        for tick in range(self.ticks + 1, self.ticks + steps + 1):
+            self.ensemble.step(self.time_step, self.method)
+            if tick == self.checkpoints.next_tick():
+                self.checkpoints.save(self.ensemble)
+        super().add_time(steps)
+
+    def evaluate(self, times) -> tuple:
+        # Смещение и скорость в единицах траектории, как у Pendulum.evaluate.
+        # Если times продолжают предыдущий запрос, интегрирование продолжается с места остановки,
+        # поэтому длинный ряд можно запрашивать кусками.
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        checkpoints = self.evaluation_checkpoints
+        if self.evaluation_ensemble is None or (len(times) and times[0] < self.evaluation_ensemble.time):
+            tick = math.floor(times[0] / self.time_step) if len(times) else 0
+            self.evaluation_ensemble = checkpoints.restore(tick)[1]
+        ensemble = self.evaluation_ensemble
+        parts = []
+        # По дороге сохраняются копии на каждом пройденном тике checkpoints.next_tick().
+        while len(times) and times[-1] >= checkpoints.next_tick() * self.time_step:
+            boundary = checkpoints.next_tick() * self.time_step
+            head = np.searchsorted(times, boundary)
+            parts.append(ensemble.sample(times[:head], self.time_step, self.method))
+            ensemble.sample([boundary], self.time_step, self.method)
+            checkpoints.save(ensemble)
+            times = times[head:]
+        parts.append(ensemble.sample(times, self.time_step, self.method))
+        angles = np.concatenate([part[0] for part in parts])
+        speeds = np.concatenate([part[1] for part in parts])
+        return angles[:, self.member] * self.accuracy, speeds[:, self.member] * self.accuracy
+
+    def positions(self, deviation) -> tuple:
+        angle = np.asarray(deviation) / self.accuracy
+        xs = np.rint(self.length_of_rope * np.cos(PI/2 + angle) + self.fulcrum.x).astype(int)
+        ys = np.rint(self.length_of_rope * np.sin(PI/2 + angle) + self.fulcrum.y).astype(int)
+        return xs, ys
+
+    def position_at_angle(self, angle: float) -> Point:
+        return Point(
+            round(self.length_of_rope * math.cos(PI/2 + angle) + self.fulcrum.x),
+            round(self.length_of_rope * math.sin(PI/2 + angle) + self.fulcrum.y)
+        )
+
+    @property
+    def angle(self) -> float:
+        return float(self.ensemble.angle[self.member])
+
+    @property
+    def drive_frequency(self) -> float:
+        return float(np.broadcast_to(self.ensemble.drive_frequency, self.ensemble.angle.shape)[self.member])
+
+    @property
+    def drive_force(self) -> float:
+        return float(np.broadcast_to(self.ensemble.drive_force, self.ensemble.angle.shape)[self.member])
+
+    def compute_state(self) -> tuple:
+        return self.angle * self.accuracy, float(self.ensemble.angular_speed[self.member]) * self.accuracy
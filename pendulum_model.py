@@ -0,0 +1,143 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from phase_rotator import PhaseRotator
+from point import Point
+
+PI = math.pi
+
+
+class Pendulum:
+    def __init__(self, fulcrum: Point, length_of_rope: int, peroid: float, amplitude: float) -> None:
+        self.fulcrum = fulcrum
+        self.length_of_rope = length_of_rope
+        self.amplitude = amplitude
+
+        self.period = peroid
+
+        self.trajectory: Trajectory = None
+        self.accuracy = 250
+        self.generate_trajectory(self.accuracy)
+        self.current_position_in_trajectory: float = 0
+
+        self.current_position: Point = self.trajectory.point(self.current_position_in_trajectory)
+
+        self.time_step: float = 0.05 # Шаг по времени за один тик.
+        self.ticks: int = 0
+        self.timer: float = 0.
+
+    def move(self, steps: int = 1) -> None:
+        # Сначала время, потом положение: после перемотки груз сразу стоит там, где должен.
+        self.add_time(steps)
+        self.current_position_in_trajectory = self.math_position_in_trajectory + self.maximal_deviation
+        self.current_position = self.trajectory.point(self.current_position_in_trajectory)
+
+    def add_time(self, steps: int = 1) -> None:
+        # Время считаем от целого числа тиков, чтобы не накапливалась ошибка сложения float.
+        self.ticks += steps
+        self.timer = self.ticks * self.time_step
+
+    def evaluate(self, times, period=None, amplitude=None) -> tuple:
+        # Смещение и скорость для массива моментов времени, состояние объекта не меняется.
+        # period и amplitude могут быть массивами, они broadcast-ятся с times по правилам numpy:
+        # например, period[:, None] и times[None, :] дают таблицу "конфигурация x время".
+        times = np.asarray(times, dtype=float)
+        period = self.period if period is None else np.asarray(period, dtype=float)
+        if amplitude is None:
+            maximal_deviation = self.maximal_deviation
+        else:
+            maximal_deviation = self.deviation_for_amplitude(np.asarray(amplitude, dtype=float))
+
+        cyclic_frequency = PI * 2 / period
+        phase = cyclic_frequency * times
+        deviation = maximal_deviation * np.cos(phase)
+        speed = -maximal_deviation * cyclic_frequency * np.sin(phase)
+        return deviation, speed
+
+    def positions(self, deviation) -> tuple:
+        # Координаты груза для массива смещений, как в move().
+        indexes = np.clip(np.rint(np.asarray(deviation) + self.maximal_deviation), 0, len(self.trajectory) - 1).astype(int)
+        return self.trajectory.xs[indexes], self.trajectory.ys[indexes]
+
+    def deviation_for_amplitude(self, amplitude):
+        # То же, что len(self.trajectory) / 2, но без построения траектории.
+        start_trajectory, end_trajectory = self.converted_amplitude(amplitude)
+        return (np.trunc(end_trajectory * self.accuracy) - np.trunc(start_trajectory * self.accuracy)) / 2
+
+    def state(self) -> tuple:
+        # Смещение и скорость в текущий тик. Считаются один раз за тик, а спрайт, графики и запись берут готовые.
+        if self.state_ticks != self.ticks:
+            self.current_state = self.compute_state()
+            self.state_ticks = self.ticks
+        return self.current_state
+
+    def compute_state(self) -> tuple:
+        if self.rotator is None or self.rotator.step != self.time_step:
+            self.rotator = PhaseRotator(self.cyclic_frequency, self.time_step)
+        phasor = self.rotator.at(self.ticks)
+        return float(self.maximal_deviation * phasor.real), float(-self.maximal_speed * phasor.imag)
+
+    @property
+    def math_position_in_trajectory(self) -> float:
+        return self.state()[0]
+
+    @property
+    def speed(self) -> float:
+        return self.state()[1]
+
+    def update_constants(self) -> None:
+        # Величины, которые зависят только от параметров. После изменения period или amplitude
+        # нужно вызвать generate_trajectory(), и они пересчитаются вместе с траекторией.
+        self.cyclic_frequency = PI * 2 / self.period
+        self.maximal_deviation = len(self.trajectory) / 2
+        self.maximal_speed = self.maximal_deviation * self.cyclic_frequency
+        self.rotator: PhaseRotator = None
+        self.state_ticks: int = None
+
+    def generate_trajectory(self, accuracy=250) -> None:
+        self.trajectory = trajectory_table(
+            self.fulcrum.x,
+            self.fulcrum.y,
+            self.length_of_rope,
+            self.amplitude,
+            accuracy
+        )
+        self.update_constants()
+
+    def converted_amplitude(self, amplitude=None) -> tuple:
+        amplitude = self.amplitude if amplitude is None else amplitude
+        in_radians = amplitude * PI / 180
+        return PI/2 - in_radians, PI/2 + in_radians
+
+
+class Trajectory:
+    def __init__(self, xs: np.ndarray, ys: np.ndarray) -> None:
+        self.xs = xs
+        self.ys = ys
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __getitem__(self, index: int) -> Point:
+        return Point(int(self.xs[index]), int(self.ys[index]))
+
+    def point(self, position: float) -> Point:
+        # Округляем положение и прижимаем его к краям траектории.
+        index = min(max(int(round(position)), 0), len(self.xs) - 1)
+        return Point(int(self.xs[index]), int(self.ys[index]))
+
+
+@lru_cache(maxsize=128)
+def trajectory_table(fulcrum_x: int, fulcrum_y: int, length_of_rope: int, amplitude: float, accuracy: int) -> Trajectory:
+    # Таблица общая для всех маятников с одинаковыми параметрами, поэтому массивы только для чтения.
+    in_radians = amplitude * PI / 180
+    start_trajectory, end_trajectory = PI/2 - in_radians, PI/2 + in_radians
+    corners = np.arange(int(start_trajectory * accuracy), int(end_trajectory * accuracy)) / accuracy
+
+    xs = np.round(length_of_rope * np.cos(corners) + fulcrum_x).astype(np.int32)
+    ys = np.round(length_of_rope * np.sin(corners) + fulcrum_y).astype(np.int32)
+    xs.flags.writeable = False
+    ys.flags.writeable = False
+    return Trajectory(xs, ys)
@@ -0,0 +1,138 @@
+import hashlib
+import math
+import os
+from functools import lru_cache
+from itertools import repeat
+
+import numpy as np
+
+# Точный период математического маятника: T = 4·sqrt(L / g)·K(sin(θ0 / 2)),
+# где K - полный эллиптический интеграл первого рода, K(k) = π / (2·AGM(1, sqrt(1 - k²))).
+# Амплитуда, как и в Pendulum, задается в градусах. При θ0 = 180° период бесконечен.
+
+PI = math.pi
+G = 9.81
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "oscillations", "periods")
+FIELDS = ("period", "small_period", "maximal_speed", "half_width", "rise")
+
+
+def agm(a, b, max_iterations: int = 32):
+    # Среднее арифметико-геометрическое, сходится квадратично: обычно хватает 5-6 итераций.
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    for _ in range(max_iterations):
+        if np.all(np.abs(a - b) <= 1e-15 * np.abs(a)):
+            break
+        a, b = (a + b) / 2, np.sqrt(a * b)
+    return a
+
+
+def ellipk(k):
+    k = np.asarray(k, dtype=float)
+    with np.errstate(divide="ignore"):
+        return PI / (2 * agm(1., np.sqrt(1 - k * k)))
+
+
+def period_ratio(amplitude):
+    # Во сколько раз точный период больше периода малых колебаний 2π·sqrt(L / g).
+    return 2 * ellipk(np.sin(np.radians(amplitude) / 2)) / PI
+
+
+def sweep_block(lengths, amplitudes, gs) -> dict:
+    # Все величины для сетки (длина, амплитуда, g) формы (len(lengths), len(amplitudes), len(gs)).
+    length = np.asarray(lengths, dtype=float)[:, None, None]
+    angle = np.radians(np.asarray(amplitudes, dtype=float))[None, :, None]
+    g = np.asarray(gs, dtype=float)[None, None, :]
+
+    ones = np.ones(np.broadcast_shapes(length.shape, angle.shape, g.shape))
+    small_period = 2 * PI * np.sqrt(length / g)
+    return {
+        "period": small_period * period_ratio(np.degrees(angle)),
+        "small_period": small_period * ones,
+        # Из закона сохранения энергии: v = sqrt(2gL(1 - cosθ0)) = 2·sqrt(gL)·sin(θ0 / 2).
+        "maximal_speed": 2 * np.sqrt(g * length) * np.sin(angle / 2),
+        # Размах траектории по горизонтали (от опоры) и подъем груза над нижней точкой.
+        "half_width": length * np.sin(np.minimum(angle, PI / 2)) * ones,
+        "rise": length * (1 - np.cos(angle)) * ones,
+    }
+
+
+def cache_key(lengths, amplitudes, gs) -> str:
+    # Ключ зависит только от содержимого сеток, поэтому одинаковый запрос всегда попадает в кэш.
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for grid in (lengths, amplitudes, gs):
+        grid = np.ascontiguousarray(grid, dtype="<f8")
+        digest.update(len(grid).to_bytes(8, "little"))
+        digest.update(grid.tobytes())
+    return digest.hexdigest()
+
+
+def load_cached(path: str):
+    try:
+        with np.load(path) as data:
+            return {name: data[name] for name in FIELDS}
+    except (OSError, KeyError, ValueError):
+        # Нет файла или он поврежден - просто считаем заново.
+        return None
+
+
+def save_cached(path: str, result: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Пишем во временный файл и переименовываем, чтобы параллельный читатель не увидел половину.
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        np.savez(f, **result)
+    os.replace(temporary, path)
+
+
+def sweep(lengths, amplitudes, gs=G, processes=None, parallel_threshold=4_000_000, cache_dir=CACHE_DIR) -> dict:
+    # Результаты хранятся на диске под хэшем сеток; cache_dir=None отключает кэш.
+    # Большие сетки режутся по длинам и считаются в пуле процессов.
+    lengths = np.atleast_1d(np.asarray(lengths, dtype=float))
+    amplitudes = np.atleast_1d(np.asarray(amplitudes, dtype=float))
+    gs = np.atleast_1d(np.asarray(gs, dtype=float))
+
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, cache_key(lengths, amplitudes, gs) + ".npz")
+        result = load_cached(path)
+        if result is not None:
+            return result
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or lengths.size * amplitudes.size * gs.size < parallel_threshold:
+        result = sweep_block(lengths, amplitudes, gs)
+    else:
+        # Импорт здесь: concurrent.futures заметно удлиняет запуск, а пул нужен только большим сеткам.
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = np.array_split(lengths, min(processes * 4, len(lengths)))
+        with ProcessPoolExecutor(processes) as pool:
+            blocks = list(pool.map(sweep_block, chunks, repeat(amplitudes), repeat(gs)))
+        result = {name: np.concatenate([block[name] for block in blocks]) for name in FIELDS}
+
+    if path is not None:
+        save_cached(path, result)
+    return result
+
+
+@lru_cache(maxsize=1)
+def ratio_table(step: float = 0.01, cache_dir=CACHE_DIR) -> tuple:
+    # Таблица T / T0 по амплитуде для мгновенных запросов из меню.
+    amplitudes = np.arange(0., 180., step)
+    result = sweep(1., amplitudes, 1., processes=1, cache_dir=cache_dir)
+    ratios = result["period"][0, :, 0] / (2 * PI)
+    return amplitudes, ratios
+
+
+def exact_period(small_period: float, amplitude: float) -> float:
+    # Точный период маятника, у которого период малых колебаний равен small_period.
+    amplitude = abs(amplitude)
+    if amplitude >= 180:
+        return math.inf
+    amplitudes, ratios = ratio_table()
+    if amplitude > amplitudes[-1] - 1:
+        # У 180° отношение растет логарифмически и интерполяция по таблице неточна.
+        return small_period * float(period_ratio(amplitude))
+    return small_period * float(np.interp(amplitude, amplitudes, ratios))
@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+# Плотность точек на фазовой плоскости (смещение - скорость, заряд - ток) в виде двумерной гистограммы.
+# Память и стоимость отрисовки зависят только от размера сетки, а не от числа добавленных точек.
+# Модуль не импортирует pygame, поэтому им можно пользоваться и в headless.py.
+
+PI = math.pi
+
+# Опорные цвета палитры в духе "inferno": от черного через фиолетовый и красный к светло-желтому.
+PALETTE = np.array([
+    (0, 0, 0),
+    (40, 11, 84),
+    (101, 21, 110),
+    (159, 42, 99),
+    (212, 72, 66),
+    (245, 125, 21),
+    (250, 193, 39),
+    (252, 255, 164),
+], dtype=float)
+
+
+def colormap(levels: int = 256, palette=PALETTE) -> np.ndarray:
+    # Таблица (levels, 3) uint8: цвет для каждого уровня яркости.
+    anchors = np.linspace(0, 1, len(palette))
+    positions = np.linspace(0, 1, levels)
+    channels = [np.interp(positions, anchors, palette[:, i]) for i in range(3)]
+    return np.rint(np.column_stack(channels)).astype(np.uint8)
+
+
+class DensityHistogram:
+    def __init__(self, x_limit: float = None, y_limit: float = None, size: tuple = (160, 160)) -> None:
+        # Сетка покрывает [-x_limit, x_limit] x [-y_limit, y_limit]. Если пределы не заданы,
+        # они берутся по первой порции точек с запасом; точки за пределами только подсчитываются.
+        self.width, self.height = size
+        self.x_limit = x_limit
+        self.y_limit = y_limit
+        # Индексация как у pygame.surfarray: counts[x, y], y растет вниз.
+        self.counts = np.zeros(size, dtype=np.uint32)
+        self.total = 0
+        self.outside = 0
+
+    def add(self, xs, ys) -> None:
+        xs = np.atleast_1d(np.asarray(xs, dtype=float))
+        ys = np.atleast_1d(np.asarray(ys, dtype=float))
+        if not len(xs):
+            return
+        if self.x_limit is None:
+            self.x_limit = float(np.abs(xs).max()) * 1.25 or 1.
+        if self.y_limit is None:
+            self.y_limit = float(np.abs(ys).max()) * 1.25 or 1.
+
+        columns = np.floor((xs / self.x_limit + 1) / 2 * self.width).astype(np.int64)
+        rows = np.floor((1 - ys / self.y_limit) / 2 * self.height).astype(np.int64)
+        inside = (columns >= 0) & (columns < self.width) & (rows >= 0) & (rows < self.height)
+        columns, rows = columns[inside], rows[inside]
+
+        # Для нескольких точек за кадр дешевле add.at, для больших порций - один bincount по всей сетке.
+        if len(columns) < 4096:
+            np.add.at(self.counts, (columns, rows), 1)
+        else:
+            flat = np.bincount(columns * self.height + rows, minlength=self.counts.size)
+            self.counts += flat.reshape(self.counts.shape).astype(np.uint32)
+        self.total += len(xs)
+        self.outside += len(xs) - len(columns)
+
+    def clear(self) -> None:
+        self.counts[:] = 0
+        self.total = 0
+        self.outside = 0
+
+    def levels(self, count: int = 256) -> np.ndarray:
+        # Логарифмическая шкала: и редкие, и частые области видны одновременно.
+        maximum = self.counts.max()
+        if not maximum:
+            return np.zeros(self.counts.shape, dtype=np.uint8)
+        scaled = np.log1p(self.counts) * ((count - 1) / math.log1p(maximum))
+        return scaled.astype(np.uint8)
+
+    def pixels(self, lut: np.ndarray = None) -> np.ndarray:
+        # Массив (width, height, 3) для pygame.surfarray.
+        lut = colormap() if lut is None else lut
+        return lut[self.levels(len(lut))]
+
+
+def wrap_angle(values, turn: float = 2 * PI):
+    # Угол в [-turn/2, turn/2): маятник с вынуждающей силой может раскручиваться через верх.
+    return (np.asarray(values) + turn / 2) % turn - turn / 2
+
+
+def poincare_mask(times, drive_frequency: float, previous_time: float) -> np.ndarray:
+    # Для ряда с постоянным шагом: первые отсчеты после каждого очередного периода силы.
+    # Периоды сравниваются целыми номерами floor(t·Ω/2π), а не моментами сечения: момент, округленный
+    # на ulp за последний отсчет куска, не должен выпадать из него. Фаза сечения плавает в пределах
+    # одного шага, зато точки берутся из уже посчитанных значений.
+    times = np.asarray(times, dtype=float)
+    periods = np.floor(np.concatenate(([previous_time], times)) * drive_frequency / (2 * PI))
+    return np.diff(periods) > 0
@@ -0,0 +1,48 @@
+import pygame
+
+from phase_density import DensityHistogram, colormap
+
+WHITE = (255, 255, 255)
+
+
+class PhasePortrait(pygame.sprite.DirtySprite):
+    # Плотность фазовой траектории поверх сцены. Точки копятся всегда, а картинка пересчитывается,
+    # только пока портрет показан, и не чаще раза в refresh кадров.
+    def __init__(self, x_limit: float, y_limit: float, midbottom: tuple, size: tuple = (160, 160), refresh: int = 5) -> None:
+        super().__init__()
+        self.layer = 2
+        self.visible = 0
+        self.histogram = DensityHistogram(x_limit, y_limit, size)
+        self.lut = colormap()
+        self.refresh = refresh
+        self.frames = 0
+        self.drawn_total = None
+
+        self.image = pygame.Surface(size)
+        self.rect = self.image.get_rect(midbottom=midbottom)
+
+    def add(self, xs, ys) -> None:
+        self.histogram.add(xs, ys)
+
+    def clear(self) -> None:
+        self.histogram.clear()
+
+    def toggle(self) -> None:
+        self.visible = 0 if self.visible else 1
+        self.drawn_total = None
+        self.dirty = 1
+
+    def update(self, *args) -> None:
+        if not self.visible:
+            return
+        self.frames += 1
+        if self.histogram.total == self.drawn_total or (self.drawn_total is not None and self.frames % self.refresh):
+            return
+        self.drawn_total = self.histogram.total
+        pygame.surfarray.blit_array(self.image, self.histogram.pixels(self.lut))
+        # Оси фазовой плоскости и рамка.
+        width, height = self.image.get_size()
+        pygame.draw.line(self.image, WHITE, (width // 2, 0), (width // 2, height), 1)
+        pygame.draw.line(self.image, WHITE, (0, height // 2), (width, height // 2), 1)
+        pygame.draw.rect(self.image, WHITE, self.image.get_rect(), 1)
+        self.dirty = 1
@@ -0,0 +1,45 @@
+import numpy as np
+
+# exp((-decay + iω)·t) на равномерной сетке t = ticks·step без cos/sin на каждом шаге:
+# следующее значение - предыдущее, умноженное на exp((-decay + iω)·step). frequency и decay могут быть
+# массивами, тогда за один шаг поворачиваются все осцилляторы сразу.
+# Округления при умножении понемногу уводят модуль и фазу, поэтому раз в resync шагов,
+# как и при скачке по времени, значение считается заново через exp.
+
+
+class PhaseRotator:
+    # Сколько шагов вперед делается умножениями; дальше дешевле сразу посчитать точное значение.
+    maximal_steps = 8
+
+    def __init__(self, frequency, step: float, decay=0., resync: int = 64) -> None:
+        self.exponent = -np.asarray(decay, dtype=float) + 1j * np.asarray(frequency, dtype=float)
+        self.step = step
+        self.resync = resync
+        self.rotator = as_scalar(np.exp(self.exponent * step))
+        self.ticks = 0
+        self.since_resync = 0
+        self.phasor = as_scalar(np.ones_like(self.exponent))
+
+    def seek(self, ticks: int):
+        self.ticks = ticks
+        self.since_resync = 0
+        self.phasor = as_scalar(np.exp(self.exponent * (ticks * self.step)))
+        return self.phasor
+
+    def advance(self, steps: int = 1):
+        if not 0 <= steps <= self.maximal_steps or self.since_resync + steps >= self.resync:
+            return self.seek(self.ticks + steps)
+        for _ in range(steps):
+            self.phasor = self.phasor * self.rotator
+        self.ticks += steps
+        self.since_resync += steps
+        return self.phasor
+
+    def at(self, ticks: int):
+        # Значение в тик ticks: шагом от текущего, если ticks немного впереди, иначе заново.
+        return self.advance(ticks - self.ticks)
+
+
+def as_scalar(value):
+    # Для одного осциллятора обычный complex умножается в несколько раз быстрее, чем скаляр numpy.
+    return complex(value) if np.ndim(value) == 0 else value
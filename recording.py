@@ -0,0 +1,115 @@
+import json
+import os
+
+import numpy as np
+
+# Запись прогона: заголовок с JSON-описанием и дальше записи фиксированной длины,
+# по одной на тик. Файл открывается через np.memmap, целиком в память не читается.
+# Рядом лежит разреженный индекс path + ".idx": время каждой index_stride-й записи.
+
+MAGIC = b"OSCREC01"
+RECORD_DTYPE = np.dtype([
+    ("tick", "<i8"),
+    ("time", "<f8"),
+    ("first", "<f8"), # смещение или заряд
+    ("second", "<f8"), # скорость или сила тока
+    ("x", "<i4"), # то, что рисуется: координаты груза или радиусы областей поля
+    ("y", "<i4"),
+])
+
+
+class RecordingWriter:
+    def __init__(self, path: str, description: dict, index_stride: int = 1024, buffer_size: int = 4096) -> None:
+        self.path = path
+        self.index_stride = index_stride
+        self.buffer = np.empty(buffer_size, dtype=RECORD_DTYPE)
+        self.buffered = 0
+        self.count = 0
+        self.index = []
+
+        header = json.dumps(dict(description, index_stride=index_stride), ensure_ascii=False).encode("utf-8")
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % RECORD_DTYPE.itemsize) # выравнивание записей
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + len(header).to_bytes(4, "little") + header)
+
+    def append(self, ticks, times, first, second, xs, ys) -> None:
+        # Все аргументы - массивы одинаковой длины (или числа для одной записи).
+        columns = [np.atleast_1d(i) for i in (ticks, times, first, second, xs, ys)]
+        for start in range(0, len(columns[0]), len(self.buffer)):
+            part = [i[start:start + len(self.buffer)] for i in columns]
+            size = len(part[0])
+            if self.buffered + size > len(self.buffer):
+                self.flush()
+            chunk = self.buffer[self.buffered:self.buffered + size]
+            for name, values in zip(RECORD_DTYPE.names, part):
+                chunk[name] = values
+
+            # Время тех записей, номера которых кратны index_stride.
+            first_indexed = -(-self.count // self.index_stride) * self.index_stride
+            self.index.extend(chunk["time"][first_indexed - self.count::self.index_stride].tolist())
+            self.buffered += size
+            self.count += size
+
+    def flush(self) -> None:
+        self.file.write(self.buffer[:self.buffered].tobytes())
+        self.buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+        np.save(self.path + ".idx.npy", np.array(self.index, dtype=float))
+
+
+class Recording:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} не является записью симуляции")
+            header_size = int.from_bytes(f.read(4), "little")
+            self.description = json.loads(f.read(header_size).decode("utf-8"))
+
+        offset = len(MAGIC) + 4 + header_size
+        count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+        self.index_stride = self.description["index_stride"]
+        index_path = path + ".idx.npy"
+        if os.path.exists(index_path):
+            self.index = np.load(index_path)
+        else:
+            # Индекс можно восстановить, прочитав лишь каждую index_stride-ю запись.
+            self.index = np.array(self.records["time"][::self.index_stride])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def start_time(self) -> float:
+        return float(self.records["time"][0])
+
+    @property
+    def end_time(self) -> float:
+        return float(self.records["time"][-1])
+
+    def seek(self, time: float) -> int:
+        # Номер последней записи с временем не больше time за O(log n):
+        # сначала по разреженному индексу, потом внутри одного блока.
+        block = max(int(np.searchsorted(self.index, time, side="right")) - 1, 0)
+        start = block * self.index_stride
+        times = self.records["time"][start:start + self.index_stride]
+        position = start + int(np.searchsorted(times, time, side="right")) - 1
+        return min(max(position, 0), len(self.records) - 1)
+
+    def at(self, time: float):
+        return self.records[self.seek(time)]
+
+    def indexes(self, times) -> np.ndarray:
+        # Векторный вариант seek для массива моментов времени.
+        positions = np.searchsorted(self.records["time"], np.asarray(times, dtype=float), side="right") - 1
+        return np.clip(positions, 0, len(self.records) - 1)
+
+    def slice(self, start: float, end: float):
+        return self.records[self.seek(start):self.seek(end) + 1]
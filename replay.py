@@ -0,0 +1,109 @@
+from coupled_chain import CoupledChainDrawer
+from electronic_oscillator import ElectronicOscillatorDrawer
+from electronic_oscillator_model import ElectronicOscillator
+from pendulum import PendulumDrawer
+from pendulum_model import Pendulum
+from point import Point
+from recording import Recording
+
+# Модели, которые не считают физику, а читают сохраненную запись.
+# Их подставляют в обычные рисовальщики, поэтому воспроизведение выглядит так же, как живой прогон.
+
+
+class ReplayPendulum(Pendulum):
+    def __init__(self, recording: Recording) -> None:
+        description = recording.description
+        super().__init__(Point(*description["fulcrum"]), description["length_of_rope"], description["period"], description["amplitude"])
+        self.recording = recording
+        self.time_step = description["time_step"]
+        self.last_tick = int(recording.records["tick"][-1])
+
+    def move(self, steps: int = 1) -> None:
+        self.add_time(steps)
+        record = self.recording.at(self.timer)
+        self.current_position = Point(int(record["x"]), int(record["y"]))
+
+    def add_time(self, steps: int = 1) -> None:
+        # За пределы записи не выходим: в конце воспроизведение останавливается.
+        self.ticks = min(max(self.ticks + steps, 0), self.last_tick)
+        self.timer = self.ticks * self.time_step
+
+    def evaluate(self, times, period=None, amplitude=None) -> tuple:
+        records = self.recording.records[self.recording.indexes(times)]
+        return records["first"], records["second"]
+
+    def compute_state(self) -> tuple:
+        record = self.recording.at(self.timer)
+        return float(record["first"]), float(record["second"])
+
+
+class ReplayOscillator(ElectronicOscillator):
+    def __init__(self, recording: Recording) -> None:
+        description = recording.description
+        super().__init__(
+            description["maximal_charge"],
+            description["period"],
+            description["resistance"],
+            description["inductance"],
+            description["source_voltage"],
+            description["source_frequency"]
+        )
+        self.recording = recording
+        self.time_step = description["time_step"]
+        self.last_tick = int(recording.records["tick"][-1])
+
+    def add_time(self, steps: int = 1) -> None:
+        self.ticks = min(max(self.ticks + steps, 0), self.last_tick)
+        self.timer = self.ticks * self.time_step
+
+    def evaluate(self, times, period=None, maximal_charge=None) -> tuple:
+        records = self.recording.records[self.recording.indexes(times)]
+        return records["first"], records["second"]
+
+    def compute_state(self) -> tuple:
+        record = self.recording.at(self.timer)
+        return float(record["first"]), float(record["second"])
+
+
+def open_replay(path: str, screen, graphs: bool | str = True):
+    recording = Recording(path)
+    if not len(recording):
+        raise ValueError(f"{path}: запись пуста")
+    description = recording.description
+    if description["kind"] == "pendulum":
+        pendulum = ReplayPendulum(recording)
+        return PendulumDrawer(
+            pendulum.fulcrum,
+            pendulum.length_of_rope,
+            pendulum.period,
+            pendulum.amplitude,
+            description["sprite"],
+            screen,
+            pendulum,
+            graphs
+        )
+    if description["kind"] == "electronic":
+        oscillator = ReplayOscillator(recording)
+        return ElectronicOscillatorDrawer(
+            Point(*description["center"]),
+            oscillator.maximal_charge,
+            oscillator.period,
+            description["sprite"],
+            screen,
+            oscillator=oscillator,
+            graphs=graphs
+        )
+    if description["kind"] == "chain":
+        # Цепочка считается точно в любой момент, поэтому ее достаточно построить заново по описанию.
+        return CoupledChainDrawer(
+            Point(*description["center"]),
+            description["width"],
+            description["count"],
+            description["period"],
+            description["coupling"],
+            description["amplitude"],
+            screen,
+            description["boundary"],
+            graphs=graphs
+        )
+    raise ValueError(f"{path}: неизвестный тип записи {description['kind']!r}")
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, dtype=float) -> None:
+        self.capacity = capacity
+        # Каждое значение пишется дважды: в data[i] и в data[i + capacity].
+        # Тогда последние size значений всегда лежат подряд и view() обходится без копирования.
+        self.data = np.zeros(capacity * 2, dtype=dtype)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, value) -> None:
+        end = (self.start + self.size) % self.capacity
+        self.data[end] = value
+        self.data[end + self.capacity] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def extend(self, values) -> None:
+        values = np.asarray(values)[-self.capacity:]
+        count = len(values)
+        end = (self.start + self.size) % self.capacity
+        indexes = (end + np.arange(count)) % self.capacity
+        self.data[indexes] = values
+        self.data[indexes + self.capacity] = values
+
+        overflow = max(0, self.size + count - self.capacity)
+        self.size = min(self.capacity, self.size + count)
+        self.start = (self.start + overflow) % self.capacity
+
+    def view(self) -> np.ndarray:
+        return self.data[self.start:self.start + self.size]
+
+    def last(self):
+        return self.data[self.start + self.size - 1]
+
+    def clear(self) -> None:
+        self.start = 0
+        self.size = 0
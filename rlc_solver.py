@@ -0,0 +1,95 @@
+import os
+from itertools import repeat
+
+import numpy as np
+
+# Уравнение контура: q'' + 2β·q' + ω0²·q = (E0 / L)·cos(Ωt), где β = R / (2L), ω0² = 1 / (LC).
+# Все функции принимают числа или массивы и broadcast-ят их по правилам numpy.
+
+
+def steady_state(natural_frequency, damping, drive_amplitude, drive_frequency) -> tuple:
+    # Амплитуда и сдвиг фазы установившихся вынужденных колебаний q = A·cos(Ωt - φ).
+    detuning = natural_frequency ** 2 - drive_frequency ** 2
+    friction = 2 * damping * drive_frequency
+    amplitude = drive_amplitude / np.hypot(detuning, friction)
+    phase = np.arctan2(friction, detuning)
+    return amplitude, phase
+
+
+def solve_rlc(times, natural_frequency, damping, initial_charge, drive_amplitude=0., drive_frequency=0.) -> tuple:
+    # Точное решение при q(0) = initial_charge, q'(0) = 0. Возвращает заряд и силу тока.
+    t = np.asarray(times, dtype=float)
+    w0 = np.asarray(natural_frequency, dtype=float)
+    beta = np.asarray(damping, dtype=float)
+
+    # При резонансе без затухания установившегося режима нет (steady_state дает бесконечность).
+    # Вместо него вековой член (E0 / 2LΩ)·t·sin(Ωt): он сам удовлетворяет q(0) = 0, q'(0) = 0.
+    resonant = (beta == 0) & (w0 == drive_frequency)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amplitude, phase = steady_state(w0, beta, drive_amplitude, drive_frequency)
+        growth = np.where(resonant, np.divide(drive_amplitude, 2 * np.asarray(drive_frequency, dtype=float)), 0.)
+    amplitude, phase = np.where(resonant, 0., amplitude), np.where(resonant, 0., phase)
+    drive_cos, drive_sin = np.cos(drive_frequency * t), np.sin(drive_frequency * t)
+    forced_charge = amplitude * np.cos(drive_frequency * t - phase) + growth * t * drive_sin
+    forced_amperage = -amplitude * drive_frequency * np.sin(drive_frequency * t - phase) + growth * (drive_sin + drive_frequency * t * drive_cos)
+
+    # Свободная часть с начальными условиями q(0) = a, q'(0) = b.
+    a = initial_charge - amplitude * np.cos(phase)
+    b = -amplitude * drive_frequency * np.sin(phase)
+    c = b + beta * a
+
+    discriminant = beta ** 2 - w0 ** 2
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Колебательный режим; при ωd -> 0 sin(ωd·t)/ωd -> t, это и есть критическое затухание.
+        wd = np.sqrt(np.maximum(-discriminant, 0))
+        decay = np.exp(-beta * t)
+        cos, sin = np.cos(wd * t), np.sin(wd * t)
+        sinc = np.where(wd > 0, sin / wd, t)
+        under_charge = decay * (a * cos + c * sinc)
+        under_amperage = -beta * under_charge + decay * (-a * wd * sin + c * cos)
+
+        # Апериодический режим. Экспоненты раскрыты, чтобы cosh не переполнялся при больших t.
+        ws = np.sqrt(np.maximum(discriminant, 0))
+        slow = np.exp((ws - beta) * t)
+        fast = np.exp(-(ws + beta) * t)
+        cosh, sinh = (slow + fast) / 2, (slow - fast) / 2
+        over_charge = a * cosh + c * np.where(ws > 0, sinh / ws, t)
+        over_amperage = -beta * over_charge + a * ws * sinh + c * cosh
+
+    overdamped = discriminant > 0
+    charge = np.where(overdamped, over_charge, under_charge) + forced_charge
+    amperage = np.where(overdamped, over_amperage, under_amperage) + forced_amperage
+    return charge, amperage
+
+
+def response_block(resistances, drive_frequencies, natural_frequency, inductance, source_voltage) -> tuple:
+    damping = np.asarray(resistances, dtype=float)[:, None] / (2 * inductance)
+    return steady_state(natural_frequency, damping, source_voltage / inductance, np.asarray(drive_frequencies)[None, :])
+
+
+def frequency_response(drive_frequencies, resistances, natural_frequency, inductance=1., source_voltage=1.,
+                       processes=None, parallel_threshold=4_000_000) -> tuple:
+    # Резонансные кривые: амплитуда заряда и фаза формы (len(resistances), len(drive_frequencies)).
+    # Большие сетки режутся по сопротивлениям и считаются в пуле процессов.
+    drive_frequencies = np.asarray(drive_frequencies, dtype=float)
+    resistances = np.atleast_1d(np.asarray(resistances, dtype=float))
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or resistances.size * drive_frequencies.size < parallel_threshold:
+        return response_block(resistances, drive_frequencies, natural_frequency, inductance, source_voltage)
+
+    # Импорт здесь: concurrent.futures заметно удлиняет запуск, а пул нужен только большим сеткам.
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = np.array_split(resistances, min(processes * 4, len(resistances)))
+    with ProcessPoolExecutor(processes) as pool:
+        blocks = list(pool.map(
+            response_block,
+            chunks,
+            repeat(drive_frequencies),
+            repeat(natural_frequency),
+            repeat(inductance),
+            repeat(source_voltage)
+        ))
+    amplitudes, phases = zip(*blocks)
+    return np.concatenate(amplitudes), np.concatenate(phases)
@@ -0,0 +1,96 @@
+import pygame
+
+BLACK = (0, 0, 0)
+
+
+class Scene:
+    # Несколько осцилляторов в одном окне. Рисуются через LayeredDirty:
+    # каждый кадр обновляются только прямоугольники спрайтов, которые сдвинулись или изменились.
+    def __init__(self, screen, panel: pygame.Rect = None) -> None:
+        # panel - полоса окна под графики pygame (graph_drawer.open_graph("pygame")), если они есть.
+        self.screen = screen
+        self.panel = panel
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(BLACK)
+
+        self.drawers = []
+        self.group = pygame.sprite.LayeredDirty()
+        self.group.clear(screen, self.background)
+
+    def __bool__(self) -> bool:
+        return bool(self.drawers)
+
+    def add(self, drawer) -> None:
+        self.drawers.append(drawer)
+        self.group.add(*drawer.components())
+        self.layout_graphs()
+        self.repaint()
+
+    def layout_graphs(self) -> None:
+        # Панели графиков делят полосу panel поровну, в порядке осцилляторов.
+        if self.panel is None:
+            return
+        graphs = [i.graph_drawer for i in self.drawers if hasattr(i.graph_drawer, "place")]
+        for index, graph in enumerate(graphs):
+            left = self.panel.x + self.panel.width * index // len(graphs)
+            right = self.panel.x + self.panel.width * (index + 1) // len(graphs)
+            graph.place(pygame.Rect(left, self.panel.y, right - left, self.panel.height))
+
+    def repaint(self) -> None:
+        # После меню экран целиком другой, поэтому первый кадр сцены рисуется полностью.
+        self.screen.blit(self.background, (0, 0))
+        self.group.repaint_rect(self.screen.get_rect())
+
+    def update(self, elapsed: float = None) -> bool:
+        # True, если хотя бы один осциллятор сдвинулся во времени; иначе кадр можно не рисовать.
+        before = [i.model.ticks for i in self.drawers]
+        for i in self.drawers:
+            i.update(elapsed)
+        return [i.model.ticks for i in self.drawers] != before
+
+    def draw(self) -> list:
+        return self.group.draw(self.screen)
+
+    def reset_clocks(self) -> None:
+        for i in self.drawers:
+            i.clock.reset()
+
+    def scale_time(self, factor: float) -> None:
+        for i in self.drawers:
+            i.clock.time_scale *= factor
+
+    def toggle_portraits(self) -> None:
+        for i in self.drawers:
+            if hasattr(i, "portrait"):
+                i.portrait.toggle()
+                i.portrait.update()
+
+    def zoom_graphs(self, factor: float) -> None:
+        # Масштаб графиков по времени, factor > 1 - отдалить.
+        for i in self.drawers:
+            i.graph_drawer.zoom(factor)
+
+    def seek(self, delta: float) -> None:
+        # Перемотка на delta секунд модельного времени вперед или назад.
+        for i in self.drawers:
+            i.seek(i.model.timer + delta)
+
+    def start_recording(self, path: str) -> None:
+        # Каждый осциллятор пишется в свой файл: path, path.2, path.3 ...
+        for number, i in enumerate(self.drawers, 1):
+            i.start_recording(path if number == 1 else f"{path}.{number}")
+
+    def abort(self) -> None:
+        for i in self.drawers:
+            i.abort()
+        self.drawers = []
+        self.group.empty()
+
+    @property
+    def fps(self) -> int:
+        return max(i.fps for i in self.drawers)
+
+
+def slot_x(index: int, count: int, width: int) -> int:
+    # Центр index-й из count одинаковых вертикальных полос окна.
+    return round(width * (index + 0.5) / count)
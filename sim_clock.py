@@ -0,0 +1,34 @@
+class SimulationClock:
+    def __init__(self, step: float, time_scale: float = 1., max_frame_time: float = 0.25) -> None:
+        self.step = step
+        self.time_scale = time_scale
+        # Если кадр рисовался дольше max_frame_time, остаток не догоняем, а учитываем в dropped_time.
+        self.max_frame_time = max_frame_time
+
+        self.accumulator: float = 0.
+        self.ticks: int = 0
+        self.dropped_time: float = 0.
+
+    def advance(self, real_elapsed: float) -> int:
+        if real_elapsed > self.max_frame_time:
+            self.dropped_time += (real_elapsed - self.max_frame_time) * self.time_scale
+            real_elapsed = self.max_frame_time
+
+        self.accumulator += real_elapsed * self.time_scale
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        self.ticks += steps
+        return steps
+
+    def reset(self) -> None:
+        self.accumulator = 0.
+
+    @property
+    def time(self) -> float:
+        return self.ticks * self.step
+
+
+def seek_ticks(model, time: float) -> int:
+    # Тик для перемотки на time: не раньше начала прогона, а при воспроизведении записи - не позже ее конца.
+    ticks = max(round(time / model.time_step), 0)
+    return min(ticks, getattr(model, "last_tick", ticks))
@@ -0,0 +1,142 @@
+import math
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+# Спектр последних window отсчетов сигнала. Для живых графиков используется скользящее ДПФ:
+# каждый новый отсчет обновляет все бины за O(1) на бин, без FFT по всей истории.
+# Перед поиском пика спектр умножается на окно Ханна прямо в частотной области.
+
+PI = math.pi
+
+
+class SlidingSpectrum:
+    def __init__(self, window: int = 256, sample_rate: float = 1., resync: int = 64) -> None:
+        self.window = window
+        self.sample_rate = sample_rate
+        # Бины 0..window/2 + 1: крайний нужен соседом для окна Ханна.
+        self.bins = np.arange(window // 2 + 2)
+        self.twiddle = np.exp(2j * PI * self.bins / window)
+        self.spectrum = np.zeros(len(self.bins), dtype=complex)
+        self.history = RingBuffer(window)
+        # Рекуррентная формула копит ошибку округления, поэтому раз в resync окон спектр пересчитывается точно.
+        self.resync_period = window * resync
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def append(self, value: float) -> None:
+        oldest = self.history.view()[0] if len(self.history) == self.window else 0.
+        self.history.append(value)
+        # X_k(n) = e^(2πik/N)·(X_k(n-1) + x(n) - x(n-N))
+        self.spectrum = self.twiddle * (self.spectrum + (value - oldest))
+        self.count += 1
+        if self.count % self.resync_period == 0:
+            self.resync()
+
+    def extend(self, values) -> None:
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        if len(values) < self.window // 8:
+            for value in values:
+                self.append(value)
+            return
+        # Длинный кусок дешевле посчитать одним FFT, чем сдвигать окно по отсчету.
+        self.history.extend(values)
+        self.count += len(values)
+        self.resync()
+
+    def resync(self) -> None:
+        samples = self.history.view()
+        padded = np.concatenate((np.zeros(self.window - len(samples)), samples))
+        self.spectrum = np.fft.fft(padded)[self.bins % self.window]
+
+    def clear(self) -> None:
+        self.history.clear()
+        self.spectrum[:] = 0
+        self.count = 0
+
+    def windowed(self) -> np.ndarray:
+        # Спектр окна Ханна 0.5 - 0.5·cos(2πm/N): свертка с ядром (-1/4, 1/2, -1/4), X_-1 = conj(X_1).
+        spectrum = self.spectrum
+        previous = np.concatenate(([np.conj(spectrum[1])], spectrum[:-2]))
+        return 0.5 * spectrum[:-1] - 0.25 * (previous + spectrum[1:])
+
+    def dominant(self) -> tuple:
+        return dominant_tone(self.windowed(), self.window, self.sample_rate)
+
+
+def windowed_spectrum(samples) -> np.ndarray:
+    # То же, что SlidingSpectrum.windowed, но по готовому массиву: для расчетов без окна (headless.write_spectrum).
+    samples = np.asarray(samples, dtype=float)
+    window = 0.5 - 0.5 * np.cos(2 * PI * np.arange(len(samples)) / len(samples))
+    return np.fft.rfft(samples * window)
+
+
+def dominant_tone(spectrum, window: int, sample_rate: float) -> tuple:
+    # Частота, амплитуда и фаза (на момент последнего отсчета) самой сильной гармоники.
+    # spectrum - спектр с окном Ханна для бинов 0..window/2. Постоянная составляющая не учитывается.
+    magnitudes = np.abs(spectrum)
+    if len(magnitudes) < 4 or not magnitudes[1:-1].any():
+        return 0., 0., 0.
+    k = int(np.argmax(magnitudes[1:-1])) + 1
+    # Уточнение между бинами по параболе через логарифмы модулей.
+    left, center, right = np.log(magnitudes[k - 1:k + 2] + 1e-300)
+    denominator = left - 2 * center + right
+    offset = 0.5 * (left - right) / denominator if denominator < 0 else 0.
+    offset = min(max(offset, -0.5), 0.5)
+
+    frequency = (k + offset) * sample_rate / window
+    # Окно Ханна ослабляет гармонику вдвое, плюс потеря между бинами: |W(δ)| = sinc(δ) / (1 - δ²).
+    loss = np.sinc(offset) / (1 - offset * offset)
+    amplitude = 4 * magnitudes[k] / (window * loss)
+    # Фаза в начале окна, перенесенная на последний отсчет.
+    start_phase = np.angle(spectrum[k]) - PI * offset
+    phase = start_phase + 2 * PI * (k + offset) * (window - 1) / window
+    phase = (phase + PI) % (2 * PI) - PI
+    return float(frequency), float(amplitude), float(phase)
+
+
+def describe_tone(tone: tuple) -> str:
+    frequency, amplitude, phase = tone
+    return f"ν ≈ {frequency:.3f} Гц, A ≈ {amplitude:.3g}, φ ≈ {math.degrees(phase):.0f}°"
+
+
+class ModelSpectrum:
+    # Спектры двух величин модели (смещение и скорость или заряд и ток) по одному отсчету на тик.
+    def __init__(self, model, window: int = 256) -> None:
+        self.model = model
+        self.spectra = (SlidingSpectrum(window, 1 / model.time_step), SlidingSpectrum(window, 1 / model.time_step))
+        self.labelled_period = None
+
+    def extend(self, first, second) -> None:
+        # Значения на каждом новом тике: рисовальщик считает их один раз и для спектра, и для записи.
+        self.spectra[0].extend(first)
+        self.spectra[1].extend(second)
+
+    def restart(self) -> None:
+        # После перемотки окно заполняется заново из последних window тиков.
+        window = self.spectra[0].window
+        ticks = np.arange(max(self.model.ticks - window + 1, 0), self.model.ticks + 1)
+        for spectrum, values in zip(self.spectra, self.model.evaluate(ticks * self.model.time_step)):
+            spectrum.clear()
+            spectrum.extend(values)
+        self.labelled_period = None
+
+    @property
+    def ready(self) -> bool:
+        # Пока в окне мало отсчетов, оценка частоты слишком грубая.
+        return len(self.spectra[0]) >= self.spectra[0].window // 4
+
+    def tones(self) -> tuple:
+        return tuple(spectrum.dominant() for spectrum in self.spectra)
+
+    def labels(self, refresh: float = 1.) -> tuple:
+        # Подписи для графиков, не чаще раза в refresh секунд модельного времени:
+        # фаза меняется каждый тик, а растеризация текста в matplotlib дорогая. Иначе None.
+        period = math.floor(self.model.timer / refresh)
+        if not self.ready or period == self.labelled_period:
+            return None
+        self.labelled_period = period
+        return tuple(describe_tone(tone) for tone in self.tones())
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import sys
+
+from electronic_oscillator_model import ElectronicOscillator
+from pendulum_ensemble import NonlinearPendulum
+from pendulum_model import Pendulum
+from point import Point
+from sim_clock import SimulationClock
+
+# Одна общая симуляция для многих зрителей по TCP (локальная сеть). pygame и matplotlib здесь не импортируются.
+# Протокол: клиент присылает строку JSON {"decimation": N}, сервер отвечает строкой JSON с описанием
+# осцилляторов и формата кадра, дальше идут кадры фиксированного размера FRAME_HEADER + MODEL_STATE на осциллятор:
+# номер кадра и время с запуска сервера, затем для каждой модели тик и два значения (смещение и скорость или заряд и ток).
+# Клиент получает каждый N-й кадр; если он не успевает читать, промежуточные кадры выбрасываются,
+# а отправляется только последний.
+
+FRAME_HEADER = "<Id"
+MODEL_STATE = "qdd"
+DEFAULT_PORT = 8765
+FPS = 20
+# Сколько кадров может ждать отправки одному клиенту, прежде чем сервер начнет пропускать для него кадры.
+WRITE_BUFFER_FRAMES = 4
+
+
+def frame_struct(count: int) -> struct.Struct:
+    return struct.Struct(FRAME_HEADER + MODEL_STATE * count)
+
+
+def build_model(description: dict):
+    # Модель по описанию осциллятора, как в сцене video_export.py.
+    kind = description["kind"]
+    if kind == "pendulum":
+        arguments = (
+            Point(*description["fulcrum"]),
+            description.get("length_of_rope", 300),
+            description["period"],
+            description["amplitude"]
+        )
+        if description.get("nonlinear"):
+            return NonlinearPendulum(
+                *arguments,
+                description.get("damping", 0.),
+                description.get("drive_force", 0.),
+                description.get("drive_frequency", 0.),
+                description.get("method", "rk4")
+            )
+        return Pendulum(*arguments)
+    if kind == "electronic":
+        return ElectronicOscillator(
+            description.get("maximal_charge", 30),
+            description["period"],
+            description.get("resistance", 0.),
+            description.get("inductance", 1.),
+            description.get("source_voltage", 0.),
+            description.get("source_frequency", 0.)
+        )
+    raise ValueError(f"неизвестный тип осциллятора {kind!r}")
+
+
+class Subscriber:
+    # Очередь клиента - одна ячейка: новый кадр заменяет неотправленный. Медленный клиент ждет
+    # в своем drain и получает самые свежие кадры, а на остальных клиентов и на симуляцию это не влияет.
+    def __init__(self, writer, decimation: int = 1) -> None:
+        self.writer = writer
+        self.decimation = decimation
+        self.pending: bytes = None
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, number: int, frame: bytes) -> None:
+        if number % self.decimation:
+            return
+        if self.pending is not None:
+            self.dropped += 1
+        self.pending = frame
+        self.ready.set()
+
+    async def run(self) -> None:
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            frame, self.pending = self.pending, None
+            self.writer.write(frame)
+            await self.writer.drain()
+            self.sent += 1
+
+
+class StreamServer:
+    def __init__(self, scene: dict, fps: float = FPS, speed: float = 1.) -> None:
+        self.descriptions = scene["drawers"]
+        self.size = scene.get("size", [800, 400])
+        self.models = [build_model(description) for description in self.descriptions]
+        self.clocks = [SimulationClock(model.time_step, speed) for model in self.models]
+        self.fps = fps
+        self.frame = frame_struct(len(self.models))
+        self.subscribers = set()
+        self.number = 0
+        self.time = 0.
+
+    def header(self, decimation: int) -> dict:
+        drawers = [dict(description, time_step=model.time_step) for description, model in zip(self.descriptions, self.models)]
+        return {
+            "size": self.size,
+            "fps": self.fps,
+            "decimation": decimation,
+            "frame_format": self.frame.format,
+            "drawers": drawers,
+        }
+
+    def step(self, elapsed: float) -> bytes:
+        # Кадр упаковывается один раз и отправляется всем подписчикам одним и тем же объектом bytes.
+        self.time += elapsed
+        values = []
+        for model, clock in zip(self.models, self.clocks):
+            steps = clock.advance(elapsed)
+            if steps:
+                model.add_time(steps)
+            values.append(model.ticks)
+            values.extend(model.state())
+        frame = self.frame.pack(self.number, self.time, *values)
+        for subscriber in self.subscribers:
+            subscriber.offer(self.number, frame)
+        self.number += 1
+        return frame
+
+    async def simulate(self) -> None:
+        loop = asyncio.get_running_loop()
+        last = deadline = loop.time()
+        while True:
+            now = loop.time()
+            self.step(now - last)
+            last = now
+            deadline += 1 / self.fps
+            await asyncio.sleep(max(deadline - loop.time(), 0))
+
+    async def handle(self, reader, writer) -> None:
+        try:
+            request = json.loads(await asyncio.wait_for(reader.readline(), 10) or b"{}")
+            decimation = max(int(request.get("decimation", 1)), 1)
+        except (asyncio.TimeoutError, ValueError, AttributeError):
+            writer.close()
+            return
+        # Очередь ограничена и в asyncio, и в ядре: у медленного клиента не копятся старые кадры.
+        writer.transport.set_write_buffer_limits(high=self.frame.size * WRITE_BUFFER_FRAMES)
+        connection = writer.get_extra_info("socket")
+        if connection is not None:
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.frame.size * WRITE_BUFFER_FRAMES)
+        writer.write(json.dumps(self.header(decimation), ensure_ascii=False).encode("utf-8") + b"\n")
+        subscriber = Subscriber(writer, decimation)
+        self.subscribers.add(subscriber)
+        peer = writer.get_extra_info("peername")
+        print(f"{peer}: подключен, каждый {decimation}-й кадр", file=sys.stderr)
+        try:
+            await subscriber.run()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+            print(f"{peer}: отключен, отправлено {subscriber.sent}, пропущено {subscriber.dropped}", file=sys.stderr)
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.simulate())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Трансляция симуляции зрителям по сети")
+    parser.add_argument("scene", help="JSON-файл сцены, как у video_export.py (pendulum, electronic)")
+    parser.add_argument("--host", default="127.0.0.1", help="0.0.0.0 - принимать подключения из локальной сети")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fps", type=float, default=FPS)
+    parser.add_argument("--speed", type=float, default=1., help="ускорение модельного времени")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    with open(args.scene, encoding="utf-8") as f:
+        scene = json.load(f)
+    if isinstance(scene, list):
+        scene = {"drawers": scene}
+    print(f"Трансляция на {args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(StreamServer(scene, args.fps, args.speed).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import argparse
+import json
+import math
+import socket
+import struct
+import sys
+import threading
+from collections import deque
+
+import numpy as np
+import pygame
+
+from assets import ASSETS
+from electronic_oscillator import ElectronicOscillatorDrawer
+from electronic_oscillator_model import ElectronicOscillator
+from pendulum import PendulumDrawer
+from pendulum_model import Pendulum
+from point import Point
+from ring_buffer import RingBuffer
+from scene import Scene
+from stream_server import DEFAULT_PORT
+
+# Зритель трансляции stream_server.py. Рисуют те же рисовальщики, что и в main.py, но модели
+# не считают физику, а берут состояние из потока - так же, как модели воспроизведения в replay.py.
+
+PI = math.pi
+HISTORY = 4096 # сколько последних кадров потока помнит каждая модель
+
+
+class StreamHistory:
+    # Принятые отсчеты одной модели. Между ними (например, при прореживании) значения интерполируются,
+    # поэтому графики и спектр получают отсчет на каждый тик, как в живом прогоне.
+    def __init__(self, capacity: int = HISTORY) -> None:
+        self.ticks = RingBuffer(capacity, np.int64)
+        self.first = RingBuffer(capacity)
+        self.second = RingBuffer(capacity)
+
+    def append(self, tick: int, first: float, second: float) -> None:
+        if len(self.ticks) and tick <= self.ticks.last():
+            return
+        self.ticks.append(tick)
+        self.first.append(first)
+        self.second.append(second)
+
+    def evaluate(self, times, time_step: float) -> tuple:
+        moments = self.ticks.view() * time_step
+        return np.interp(times, moments, self.first.view()), np.interp(times, moments, self.second.view())
+
+
+class StreamPendulum(Pendulum):
+    def __init__(self, description: dict, tick: int, first: float, second: float) -> None:
+        super().__init__(Point(*description["fulcrum"]), description.get("length_of_rope", 300), description["period"], description["amplitude"])
+        self.time_step = description["time_step"]
+        if description.get("nonlinear"):
+            # Для сечения Пуанкаре в фазовом портрете, как у NonlinearPendulum.
+            self.drive_frequency = description.get("drive_frequency", 0.)
+        self.history = StreamHistory()
+        self.receive(tick, first, second)
+        self.move(tick)
+
+    def receive(self, tick: int, first: float, second: float) -> None:
+        self.history.append(tick, first, second)
+
+    def move(self, steps: int = 1) -> None:
+        # Положение по углу, а не по траектории: маятник с вынуждающей силой может уйти за амплитуду.
+        self.add_time(steps)
+        angle = self.math_position_in_trajectory / self.accuracy
+        self.current_position = Point(
+            round(self.length_of_rope * math.cos(PI/2 + angle) + self.fulcrum.x),
+            round(self.length_of_rope * math.sin(PI/2 + angle) + self.fulcrum.y)
+        )
+
+    def evaluate(self, times, period=None, amplitude=None) -> tuple:
+        return self.history.evaluate(times, self.time_step)
+
+    def compute_state(self) -> tuple:
+        first, second = self.history.evaluate(self.timer, self.time_step)
+        return float(first), float(second)
+
+
+class StreamOscillator(ElectronicOscillator):
+    def __init__(self, description: dict, tick: int, first: float, second: float) -> None:
+        super().__init__(
+            description.get("maximal_charge", 30),
+            description["period"],
+            description.get("resistance", 0.),
+            description.get("inductance", 1.),
+            description.get("source_voltage", 0.),
+            description.get("source_frequency", 0.)
+        )
+        self.time_step = description["time_step"]
+        self.history = StreamHistory()
+        self.receive(tick, first, second)
+        self.add_time(tick)
+
+    def receive(self, tick: int, first: float, second: float) -> None:
+        self.history.append(tick, first, second)
+
+    def evaluate(self, times, period=None, maximal_charge=None) -> tuple:
+        return self.history.evaluate(times, self.time_step)
+
+    def compute_state(self) -> tuple:
+        first, second = self.history.evaluate(self.timer, self.time_step)
+        return float(first), float(second)
+
+
+class StreamClock:
+    # Замена SimulationClock: модель догоняет тик из последнего принятого кадра, а не реальное время.
+    def __init__(self, model) -> None:
+        self.model = model
+        self.target = model.ticks
+
+    def advance(self, real_elapsed: float) -> int:
+        return self.target - self.model.ticks
+
+    def reset(self) -> None:
+        pass
+
+
+class StreamClient:
+    # Кадры читаются в отдельном потоке, главный цикл раз в кадр забирает все, что пришло.
+    def __init__(self, host: str, port: int, decimation: int = 1) -> None:
+        self.socket = socket.create_connection((host, port))
+        self.socket.sendall(json.dumps({"decimation": decimation}).encode("utf-8") + b"\n")
+        self.file = self.socket.makefile("rb")
+        self.header = json.loads(self.file.readline())
+        self.frame = struct.Struct(self.header["frame_format"])
+        self.frames = deque(maxlen=HISTORY)
+        self.received = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self.read, daemon=True)
+        self.thread.start()
+
+    def read(self) -> None:
+        try:
+            while True:
+                data = self.file.read(self.frame.size)
+                if len(data) < self.frame.size:
+                    break
+                self.frames.append(self.frame.unpack(data))
+                self.received += 1
+        except OSError:
+            pass
+        self.closed = True
+
+    def take(self) -> list:
+        frames = []
+        while self.frames:
+            frames.append(self.frames.popleft())
+        return frames
+
+    def close(self) -> None:
+        # shutdown будит поток чтения; сокет закрывается только вместе с makefile.
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.thread.join(1)
+        self.file.close()
+        self.socket.close()
+
+
+def model_states(frame: tuple) -> list:
+    # (тик, первое значение, второе значение) для каждой модели; первые два поля - номер кадра и время сервера.
+    values = frame[2:]
+    return [values[i:i + 3] for i in range(0, len(values), 3)]
+
+
+def open_stream_drawer(description: dict, state: tuple, screen, graphs: bool | str = False):
+    if description["kind"] == "pendulum":
+        pendulum = StreamPendulum(description, *state)
+        drawer = PendulumDrawer(
+            pendulum.fulcrum,
+            pendulum.length_of_rope,
+            pendulum.period,
+            pendulum.amplitude,
+            description.get("sprite", "pendulum.png"),
+            screen,
+            pendulum,
+            graphs
+        )
+    elif description["kind"] == "electronic":
+        oscillator = StreamOscillator(description, *state)
+        drawer = ElectronicOscillatorDrawer(
+            Point(*description["center"]),
+            oscillator.maximal_charge,
+            oscillator.period,
+            description.get("sprite", "electronic_oscillator.png"),
+            screen,
+            oscillator=oscillator,
+            graphs=graphs
+        )
+    else:
+        raise ValueError(f"неизвестный тип осциллятора {description['kind']!r}")
+    drawer.clock = StreamClock(drawer.model)
+    return drawer
+
+
+class Viewer:
+    def __init__(self, client: StreamClient, graphs: bool | str = False) -> None:
+        self.client = client
+        header = client.header
+        pygame.display.init()
+        pygame.font.init()
+        width, height = header["size"]
+        panel = None
+        if graphs == "pygame":
+            # Как в main.py --graphs pygame: графики в полосе под осцилляторами.
+            from panel_graph import PANEL_HEIGHT
+
+            panel = pygame.Rect(0, height, width, PANEL_HEIGHT)
+        self.screen = pygame.display.set_mode((width, height + (panel.height if panel else 0)))
+        area = self.screen.subsurface((0, 0, width, height)) if panel else self.screen
+        pygame.display.set_caption("Трансляция")
+        ASSETS.preload()
+        self.fps = header["fps"]
+        self.clock = pygame.time.Clock()
+        self.running = True
+
+        # Рисовальщики строятся по первому кадру, чтобы модели сразу стояли на тике сервера.
+        frames = []
+        while not frames and not client.closed:
+            frames = client.take()
+            self.clock.tick(self.fps)
+        self.scene = Scene(self.screen, panel)
+        if frames:
+            for description, state in zip(header["drawers"], model_states(frames[-1])):
+                self.scene.add(open_stream_drawer(description, state, area, graphs))
+
+    def run(self) -> None:
+        while self.running and not (self.client.closed and not self.client.frames):
+            self.frame()
+        self.scene.abort()
+        self.client.close()
+        pygame.quit()
+
+    def frame(self) -> None:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                self.running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                self.scene.toggle_portraits()
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_EQUALS):
+                self.scene.zoom_graphs(2 if event.key == pygame.K_MINUS else 0.5)
+        for frame in self.client.take():
+            for drawer, (tick, first, second) in zip(self.scene.drawers, model_states(frame)):
+                drawer.model.receive(tick, first, second)
+                drawer.clock.target = tick
+        if self.scene.update(1 / self.fps):
+            pygame.display.update(self.scene.draw())
+        self.clock.tick(self.fps)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Зритель трансляции stream_server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--decimation", type=int, default=1, help="получать каждый N-й кадр сервера")
+    parser.add_argument(
+        "--graphs", nargs="?", choices=("matplotlib", "pygame", "none"), const="matplotlib", default="none",
+        help="показывать графики: --graphs - в окне matplotlib, --graphs pygame - в окне зрителя"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    client = StreamClient(args.host, args.port, args.decimation)
+    Viewer(client, args.graphs).run()
+    print(f"Принято кадров: {client.received}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
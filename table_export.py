@@ -0,0 +1,163 @@
+import os
+
+import numpy as np
+
+# Выгрузка таблиц кусками: строки считаются лениво, в памяти одновременно лежит не больше одного куска.
+# Форматы выбираются по расширению файла: .csv, .npy, .parquet и .txt (красивая таблица для небольших данных).
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_SIZE = 128 # Заголовок фиксированной длины, чтобы в конце можно было переписать shape на месте.
+
+
+def time_chunks(duration: float, sample_rate: float, chunk_size: int = 65536):
+    # Время считается от целого номера отсчёта, поэтому на длинных прогонах оно не "уплывает".
+    total = int(round(duration * sample_rate)) + 1
+    for start in range(0, total, chunk_size):
+        yield np.arange(start, min(start + chunk_size, total)) / sample_rate
+
+
+def model_chunks(model, duration: float, sample_rate: float, chunk_size: int = 65536):
+    # Куски формы (строки, 3): время и две величины из model.evaluate.
+    for times in time_chunks(duration, sample_rate, chunk_size):
+        first, second = model.evaluate(times)
+        yield np.column_stack((times, first, second))
+
+
+class CsvWriter:
+    def __init__(self, path: str, columns: list) -> None:
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.file.write(",".join(columns) + "\n")
+
+    def write(self, chunk) -> None:
+        np.savetxt(self.file, chunk, delimiter=",", fmt="%.10g")
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class NpyWriter:
+    # Обычный .npy float64 формы (строки, столбцы), который можно открыть через np.load(path, mmap_mode="r").
+    # С append=True строки дописываются в конец уже существующего файла.
+    def __init__(self, path: str, columns: list, append: bool = False) -> None:
+        self.columns = len(columns)
+        self.rows = 0
+        if append and os.path.exists(path):
+            self.file = open(path, "r+b")
+            self.rows = read_npy_rows(self.file, self.columns)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.file = open(path, "w+b")
+            self.write_header()
+
+    def write_header(self) -> None:
+        header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % (self.rows, self.columns)
+        header = header.ljust(NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - 1) + "\n"
+        self.file.write(NPY_MAGIC + len(header).to_bytes(2, "little") + header.encode("latin1"))
+
+    def write(self, chunk) -> None:
+        chunk = np.asarray(chunk, dtype="<f8").reshape(-1, self.columns)
+        self.file.write(chunk.tobytes())
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        self.file.seek(0)
+        self.write_header()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_npy_rows(file, columns: int) -> int:
+    file.seek(0)
+    version = np.lib.format.read_magic(file)
+    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+    if version != (1, 0) or file.tell() != NPY_HEADER_SIZE or dtype != np.dtype("<f8") or shape[1:] != (columns,):
+        raise ValueError("В этот .npy нельзя дописывать строки")
+    return shape[0]
+
+
+class ParquetWriter:
+    def __init__(self, path: str, columns: list) -> None:
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.columns = columns
+        schema = pyarrow.schema([(name, pyarrow.float64()) for name in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, schema)
+
+    def write(self, chunk) -> None:
+        chunk = np.asarray(chunk, dtype=float)
+        arrays = [self.pyarrow.array(chunk[:, i]) for i in range(len(self.columns))]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, names=self.columns))
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class TextTableWriter:
+    # Таблица tabulate в fancy_grid строится целиком в памяти, поэтому число строк ограничено.
+    def __init__(self, path: str, columns: list, max_rows: int = 1000) -> None:
+        self.path = path
+        self.columns = columns
+        self.max_rows = max_rows
+        self.rows = []
+
+    def write(self, chunk) -> None:
+        if len(self.rows) + len(chunk) > self.max_rows:
+            raise ValueError(f"Текстовая таблица ограничена {self.max_rows} строками, используйте .csv или .npy")
+        self.rows.extend(chunk.tolist() if isinstance(chunk, np.ndarray) else chunk)
+
+    def close(self) -> None:
+        from tabulate import tabulate
+
+        table = tabulate(self.rows, self.columns, tablefmt="fancy_grid")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        # Если таблица не поместилась, файл не трогаем.
+        if exc_type is None:
+            self.close()
+
+
+WRITERS = {
+    ".csv": CsvWriter,
+    ".npy": NpyWriter,
+    ".parquet": ParquetWriter,
+    ".txt": TextTableWriter,
+}
+
+
+def open_writer(path: str, columns: list, fmt: str = None):
+    fmt = fmt or os.path.splitext(path)[1].lower()
+    return WRITERS[fmt if fmt.startswith(".") else "." + fmt](path, columns)
+
+
+def export(chunks, path: str, columns: list, fmt: str = None) -> int:
+    # Записывает куски по мере их появления и возвращает число строк.
+    rows = 0
+    with open_writer(path, columns, fmt) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+            rows += len(chunk)
+    return rows
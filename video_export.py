@@ -0,0 +1,333 @@
+import os
+
+# Окно не нужно: до импорта pygame и matplotlib переключаемся на "пустые" бэкенды.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import time
+from collections import deque
+
+import pygame
+
+from assets import ASSETS
+from coupled_chain import CoupledChainDrawer
+from electronic_oscillator import ElectronicOscillatorDrawer
+from electronic_oscillator_model import ElectronicOscillator
+from pendulum import PendulumDrawer
+from pendulum_ensemble import NonlinearPendulum
+from point import Point
+from replay import open_replay
+from scene import Scene
+
+# Экспорт ролика без окна и быстрее реального времени. Кадр number показывает модельное время
+# start + number * speed / fps, сколько бы он ни рисовался, поэтому кадры можно считать отрезками
+# в разных процессах. Рисуют те же рисовальщики, что и в окне, только на Surface в памяти и без графиков.
+# Сцена - записи main.py --record или JSON-файл со списком описаний в духе describe():
+# {"size": [800, 400], "drawers": [{"kind": "pendulum", "fulcrum": [400, 0], "length_of_rope": 300, "period": 2, "amplitude": 30}]}
+
+WIDTH = 800
+HEIGHT = 400
+FRAME_NAME = "frame_%06d.png"
+# Расширения, которые pygame.image.save умеет писать; BMP и TGA пишутся быстрее PNG, но занимают больше места.
+IMAGE_FORMATS = (".png", ".bmp", ".tga", ".jpg")
+
+# Состояние процесса пула: настройки экспорта и сцена, которую он рисует.
+WORKER = {}
+
+
+class FrameClock:
+    # Замена SimulationClock: после кадра number модель стоит на тике, ближайшем к start + number * speed / fps.
+    # Отрезки из разных процессов стыкуются точно так же, как если бы весь ролик считался подряд.
+    def __init__(self, step: float, start: float, speed: float, fps: float) -> None:
+        self.step = step
+        self.start = start
+        self.speed = speed
+        self.fps = fps
+        self.frame = 0
+        self.ticks = self.ticks_at(0)
+
+    def ticks_at(self, frame: int) -> int:
+        return round((self.start + frame * self.speed / self.fps) / self.step)
+
+    def seek(self, frame: int) -> int:
+        self.frame = frame
+        self.ticks = self.ticks_at(frame)
+        return self.ticks
+
+    def advance(self, real_elapsed: float) -> int:
+        self.frame += 1
+        ticks = self.ticks_at(self.frame)
+        steps = ticks - self.ticks
+        self.ticks = ticks
+        return steps
+
+    def reset(self) -> None:
+        pass
+
+
+def build_drawer(description: dict, screen):
+    # Рисовальщик без графиков по описанию из сцены; {"replay": путь} - воспроизведение записи.
+    if "replay" in description:
+        return open_replay(description["replay"], screen, graphs=False)
+    kind = description["kind"]
+    if kind == "pendulum":
+        fulcrum = Point(*description["fulcrum"])
+        length_of_rope = description.get("length_of_rope", 300)
+        pendulum = None
+        if description.get("nonlinear"):
+            pendulum = NonlinearPendulum(
+                fulcrum,
+                length_of_rope,
+                description["period"],
+                description["amplitude"],
+                description.get("damping", 0.),
+                description.get("drive_force", 0.),
+                description.get("drive_frequency", 0.),
+                description.get("method", "rk4")
+            )
+        return PendulumDrawer(
+            fulcrum,
+            length_of_rope,
+            description["period"],
+            description["amplitude"],
+            description.get("sprite", "pendulum.png"),
+            screen,
+            pendulum,
+            graphs=False
+        )
+    if kind == "electronic":
+        oscillator = ElectronicOscillator(
+            description.get("maximal_charge", 30),
+            description["period"],
+            description.get("resistance", 0.),
+            description.get("inductance", 1.),
+            description.get("source_voltage", 0.),
+            description.get("source_frequency", 0.)
+        )
+        return ElectronicOscillatorDrawer(
+            Point(*description["center"]),
+            oscillator.maximal_charge,
+            oscillator.period,
+            description.get("sprite", "electronic_oscillator.png"),
+            screen,
+            oscillator=oscillator,
+            graphs=False
+        )
+    if kind == "chain":
+        return CoupledChainDrawer(
+            Point(*description["center"]),
+            description.get("width", 300),
+            description["count"],
+            description["period"],
+            description["coupling"],
+            description.get("amplitude", 30.),
+            screen,
+            description.get("boundary", "free"),
+            graphs=False
+        )
+    raise ValueError(f"неизвестный тип осциллятора {kind!r}")
+
+
+def load_scene(inputs: list) -> dict:
+    # JSON-файл сцены или список записей; записи сами помнят, где на экране стоял осциллятор.
+    if len(inputs) == 1 and inputs[0].endswith(".json"):
+        with open(inputs[0], encoding="utf-8") as f:
+            scene = json.load(f)
+        if isinstance(scene, list):
+            scene = {"drawers": scene}
+    else:
+        scene = {"drawers": [{"replay": path} for path in inputs]}
+    scene.setdefault("size", [WIDTH, HEIGHT])
+    return scene
+
+
+def init_worker(settings: dict) -> None:
+    # convert() у картинок требует режим экрана, поэтому создается "пустое" окно 1x1;
+    # сами кадры рисуются на отдельной поверхности нужного размера.
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    ASSETS.preload()
+    WORKER.clear()
+    WORKER["settings"] = settings
+
+
+def build_scene() -> None:
+    settings = WORKER["settings"]
+    if WORKER.get("scene") is not None:
+        WORKER["scene"].abort()
+    screen = pygame.Surface(settings["size"])
+    scene = Scene(screen)
+    for description in settings["drawers"]:
+        drawer = build_drawer(description, screen)
+        drawer.clock = FrameClock(drawer.model.time_step, settings["start"], settings["speed"], settings["fps"])
+        if hasattr(drawer, "portrait"):
+            # Портрет перерисовывается каждый кадр, иначе картинка зависела бы от того, с какого кадра начат отрезок.
+            drawer.portrait.refresh = 1
+        scene.add(drawer)
+    if settings["portraits"]:
+        scene.toggle_portraits()
+    WORKER["scene"] = scene
+    WORKER["frame"] = None
+
+
+def seek_scene(frame: int) -> None:
+    scene = WORKER["scene"]
+    for drawer in scene.drawers:
+        processed = drawer.processed_ticks
+        ticks = drawer.clock.seek(frame)
+        drawer.seek(ticks * drawer.model.time_step)
+        if WORKER["settings"]["portraits"] and hasattr(drawer, "portrait"):
+            # Портрет копит все тики с начала прогона, а не только с начала отрезка.
+            drawer.processed_ticks = processed
+            drawer.process_ticks()
+            drawer.portrait.update()
+    WORKER["frame"] = frame
+
+
+def move_to(frame: int) -> None:
+    # Следующий кадр - обычный шаг сцены, как в окне; дальше вперед - перемотка.
+    if WORKER["frame"] == frame - 1:
+        WORKER["scene"].update(1 / WORKER["settings"]["fps"])
+        WORKER["frame"] = frame
+    elif WORKER["frame"] != frame:
+        seek_scene(frame)
+
+
+def render_segment(first: int, last: int) -> list:
+    # Кадры [first, last). Процесс продолжает свою сцену, если отрезок идет дальше по времени, иначе строит ее заново.
+    # При записи картинок кадры сохраняются прямо здесь, иначе возвращаются байтами RGB для кодировщика.
+    if WORKER.get("scene") is None or (WORKER["frame"] is not None and first < WORKER["frame"]):
+        build_scene()
+    pattern = WORKER["settings"]["pattern"]
+    scene = WORKER["scene"]
+    frames = []
+    for frame in range(first, last):
+        move_to(frame)
+        scene.draw()
+        if pattern is not None:
+            pygame.image.save(scene.screen, pattern % frame)
+        else:
+            frames.append(pygame.image.tobytes(scene.screen, "RGB"))
+    return frames
+
+
+def ordered_segments(segments: list, processes: int, settings: dict):
+    # Результаты отрезков по порядку. В работе не больше 2 * processes отрезков,
+    # чтобы готовые кадры не копились в памяти, пока кодировщик занят.
+    if processes == 1:
+        init_worker(settings)
+        for first, last in segments:
+            yield render_segment(first, last)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(settings,)) as pool:
+        pending = deque()
+        for first, last in segments:
+            pending.append(pool.submit(render_segment, first, last))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def frame_pattern(output: str) -> str:
+    # Папка или шаблон вида frames/%06d.png - последовательность картинок; иначе файл ролика для кодировщика.
+    if output.lower().endswith(IMAGE_FORMATS):
+        folder = os.path.dirname(output)
+        root, extension = os.path.splitext(output)
+        pattern = output if "%" in output else root + "_%06d" + extension
+    elif output.endswith(("/", os.sep)) or os.path.isdir(output):
+        folder = output
+        pattern = os.path.join(output, FRAME_NAME)
+    else:
+        return None
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return pattern
+
+
+def encoder_command(encoder: str, output: str, size: tuple, fps: float) -> list:
+    path = shutil.which(encoder)
+    if path is None:
+        raise FileNotFoundError(f"кодировщик {encoder!r} не найден; укажите --encoder или сохраните кадры картинками")
+    return [
+        path, "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-",
+        "-pix_fmt", "yuv420p", output
+    ]
+
+
+def export(scene: dict, output: str, duration: float, start: float = 0., speed: float = 1., fps: float = 20,
+           processes: int = None, segment: int = 100, portraits: bool = False, encoder: str = "ffmpeg") -> int:
+    # duration и start - модельное время в секундах, speed - во сколько раз ролик быстрее модели.
+    # Возвращает число кадров.
+    processes = processes or os.cpu_count() or 1
+    frames = max(round(duration / speed * fps), 1)
+    pattern = frame_pattern(output)
+    settings = {
+        "drawers": scene["drawers"],
+        "size": tuple(scene["size"]),
+        "start": start,
+        "speed": speed,
+        "fps": fps,
+        "portraits": portraits,
+        "pattern": pattern,
+    }
+    segments = [(first, min(first + segment, frames)) for first in range(0, frames, segment)]
+    processes = min(processes, len(segments))
+
+    if pattern is not None:
+        for _ in ordered_segments(segments, processes, settings):
+            pass
+        return frames
+
+    process = subprocess.Popen(encoder_command(encoder, output, settings["size"], fps), stdin=subprocess.PIPE)
+    try:
+        for result in ordered_segments(segments, processes, settings):
+            for frame in result:
+                process.stdin.write(frame)
+    finally:
+        process.stdin.close()
+        code = process.wait()
+    if code:
+        raise RuntimeError(f"кодировщик завершился с кодом {code}")
+    return frames
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Экспорт ролика без окна")
+    parser.add_argument("inputs", nargs="+", help="записи main.py --record или JSON-файл сцены")
+    parser.add_argument("-o", "--output", required=True,
+                        help="файл ролика (через кодировщик), папка или шаблон картинок вида frames/%%06d.png")
+    parser.add_argument("--duration", type=float, required=True, help="модельное время, с")
+    parser.add_argument("--start", type=float, default=0., help="с какого модельного времени начать, с")
+    parser.add_argument("--speed", type=float, default=1., help="ускорение модельного времени относительно ролика")
+    parser.add_argument("--fps", type=float, default=20)
+    parser.add_argument("--processes", type=int, help="по умолчанию - число ядер")
+    parser.add_argument("--segment", type=int, default=100, help="кадров в одном задании процесса")
+    parser.add_argument("--portraits", action="store_true", help="показывать фазовые портреты")
+    parser.add_argument("--encoder", default="ffmpeg", help="программа, которой передаются кадры (совместимая с ffmpeg)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    frames = export(load_scene(args.inputs), args.output, args.duration, args.start, args.speed, args.fps,
+                    args.processes, args.segment, args.portraits, args.encoder)
+    elapsed = time.perf_counter() - started
+    length = frames / args.fps
+    print(f"{frames} кадров ({length:.1f} с ролика) за {elapsed:.1f} с, в {length / elapsed:.1f} раза быстрее реального времени",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()